@@ -3,122 +3,140 @@ import streamlit as st
 # ---------------------------
 # 기존 모듈 임포트
 # ---------------------------
-from D import (
-    extract_pat_percentiles_from_bytes, explain_results
-)
-
-from C import (
-    extract_tci_percentiles, extract_tci_m_sd, build_matching_Temperament_keys,
-    build_matching_Summary_keys, find_best_matching_key, load_temperament_dict_from_drive
-)
-from B import (
-    extract_all_scores, format_index_scores_excel, format_subtest_scores_excel
+from N import (
+    IQ_STAGES, TCI_STAGES, PAT_STAGES, run_iq, run_tci, run_pat,
+    session_job, session_profile_job, wait_with_progress
 )
+import L
+import Q
 import os
 
 
+# ---------------------------
+# ✅ 검사별 결과 표시 (개별 탭과 통합 분석 탭 공용)
+# ---------------------------
+def show_iq(result):
+    if result["지표표"] is not None:
+        st.subheader("📌 지표 점수")
+        st.dataframe(result["지표표"].fillna(""), use_container_width=True)
+
+    if result["소검사표"] is not None:
+        st.subheader("📌 소검사 점수")
+        st.dataframe(result["소검사표"].fillna(""), use_container_width=True)
+
+
+def show_tci(result):
+    st.subheader("✅ H/M/L 값")
+    st.json(result["H/M/L"])
+
+    for section in ("기질", "요약"):
+        matching_keys, rows = result[section]
+        st.subheader("🔍 매칭 키")
+        st.json(matching_keys)
+        if section == "기질":
+            st.subheader("📌 최종 결과")
+        for part, key, status, text in rows:
+            st.markdown(f"### **[{part}]** - {status}")
+            st.write(text)
+
+
+def show_pat(data):
+    st.subheader("✅ 분석 결과")
+    st.write(f"**백분위:** {data['백분위']}")
+    st.write(f"**결과:** {data['결과']}")
+
+    if data["설명"]:
+        ideal_titles, ideal_texts, non_titles, non_texts = data["설명"]
+        st.subheader(f"[이상적임] - {', '.join(ideal_titles)}")
+        for txt in ideal_texts:
+            st.write(txt)
+
+        st.subheader(f"[미흡/지나침] - {', '.join(non_titles)}")
+        for txt in non_texts:
+            st.write(txt)
+
+
 # ---------------------------
 # ✅ Streamlit UI
 # ---------------------------
 st.set_page_config(page_title="심리검사 통합 분석", layout="wide")
 st.title("📊 심리검사 통합 분석 웹")
 
-tabs = st.tabs(["🧠 지능검사", "📝 TCI", "📄 PAT"])
+# ✅ 참조 JSON은 화면을 먼저 그리고 백그라운드에서 미리 로드 (REFERENCE_PREFETCH=0 이면 끔)
+#    재실행마다가 아니라 프로세스당 한 번만 시작 (이후 갱신은 load()가 확인 간격에 맞춰 처리)
+@st.cache_resource(show_spinner=False)
+def start_prefetch():
+    return L.prefetch()
+
+if os.environ.get("REFERENCE_PREFETCH", "1") != "0":
+    start_prefetch()
+
+# ✅ 단계별 지표 내보내기 (METRICS_FILE / METRICS_PORT 가 있을 때만, 프로세스당 한 번)
+Q.start_exporters()
+
+tabs = st.tabs(["👤 통합 분석", "🧠 지능검사", "📝 TCI", "📄 PAT"])
+
+# ✅ 추출은 백그라운드 작업으로 실행, 결과는 세션에 고정 (탭 전환/위젯 조작 시 다시 파싱하지 않음)
 
 # ---------------------------
-# 1️⃣ 지능검사 탭
+# 0️⃣ 통합 분석 탭 (한 내담자의 지능검사/TCI/PAT 보고서를 한 번에)
 # ---------------------------
 with tabs[0]:
+    st.header("👤 내담자 통합 분석")
+    client_files = st.file_uploader(
+        "PDF 여러 개 업로드 (지능검사 / TCI / PAT — 검사 종류는 자동 판별)",
+        type=["pdf"], accept_multiple_files=True, key="통합분석"
+    )
+
+    if client_files:
+        job = session_profile_job("통합분석_작업", client_files)
+        profile = wait_with_progress(job)
+
+        st.subheader("📁 파일별 판별 결과")
+        st.dataframe(profile["파일"], use_container_width=True)
+        for warning in profile["경고"]:
+            st.warning(warning)
+
+        for section, title, show in (
+            ("지능검사", "🧠 지능검사", show_iq),
+            ("TCI", "📝 TCI", show_tci),
+            ("PAT", "📄 PAT", show_pat),
+        ):
+            if section in profile:
+                st.header(title)
+                show(profile[section])
+
+# ---------------------------
+# 1️⃣ 지능검사 탭
+# ---------------------------
+with tabs[1]:
     st.header("🧠 지능검사 점수 추출기")
     uploaded_file = st.file_uploader("PDF 업로드 (K-WPPSI / K-WISC / K-WAIS)", type=["pdf"], key="지능검사")
 
     if uploaded_file:
-        save_path = f"./temp_{uploaded_file.name}"
-        with open(save_path, "wb") as f:
-            f.write(uploaded_file.read())
-
         st.success(f"✅ 업로드 완료: {uploaded_file.name}")
 
-        scores, filename = extract_all_scores(save_path)
-        is_wais = "WAIS" in filename
-
-        if scores["지표점수"]:
-            st.subheader("📌 지표 점수")
-            df_index = format_index_scores_excel(scores["지표점수"], is_wais=is_wais)
-            st.dataframe(df_index.fillna(""), use_container_width=True)
-
-        if scores["소검사점수"]:
-            st.subheader("📌 소검사 점수")
-            df_subtest = format_subtest_scores_excel(scores["소검사점수"])
-            st.dataframe(df_subtest.fillna(""), use_container_width=True)
-
-        os.remove(save_path)
+        job = session_job("지능검사_작업", uploaded_file, run_iq, IQ_STAGES)
+        show_iq(wait_with_progress(job))
 
 # ---------------------------
 # 2️⃣ TCI 탭
 # ---------------------------
-with tabs[1]:
+with tabs[2]:
     st.header("📝 TCI 결과 분석")
     tci_file = st.file_uploader("TCI PDF 업로드", type=["pdf"], key="TCI")
 
     if tci_file:
-        with open("temp_tci.pdf", "wb") as f:
-            f.write(tci_file.read())
-
-        percentiles = extract_tci_percentiles("temp_tci.pdf")
-        m_sd = extract_tci_m_sd("temp_tci.pdf")
-
-        hml_values = {
-            "자극추구": percentiles.get("자극추구", {}).get("level", "M"),
-            "위험회피": percentiles.get("위험회피", {}).get("level", "M"),
-            "사회적 민감성": percentiles.get("사회적 민감성", {}).get("level", "M"),
-            "인내력": percentiles.get("인내력", {}).get("level", "M"),
-            "자율성": percentiles.get("자율성", {}).get("level", "M"),
-            "연대감": percentiles.get("연대감", {}).get("level", "M"),
-        }
-
-        st.subheader("✅ H/M/L 값")
-        st.json(hml_values)
-
-        data = load_temperament_dict_from_drive()
-        matching_keys = build_matching_Temperament_keys(hml_values, m_sd)
-        st.subheader("🔍 매칭 키")
-        st.json(matching_keys)
-
-        st.subheader("📌 최종 결과")
-        for part, key in matching_keys.items():
-            matched_key, status = find_best_matching_key(key, data.get(part, {}))
-            st.markdown(f"### **[{part}]** - {status}")
-            st.write(data.get(part, {}).get(matched_key, "❌ 설명 없음"))
-
-        matching_keys = build_matching_Summary_keys(hml_values, m_sd)
-        st.subheader("🔍 매칭 키")
-        st.json(matching_keys)
-        for part, key in matching_keys.items():
-            matched_key, status = find_best_matching_key(key, data.get(part, {}))
-            st.markdown(f"### **[{part}]** - {status}")
-            st.write(data.get(part, {}).get(matched_key, "❌ 설명 없음"))
+        job = session_job("TCI_작업", tci_file, run_tci, TCI_STAGES)
+        show_tci(wait_with_progress(job))
 
 # ---------------------------
 # 3️⃣ PAT 탭
 # ---------------------------
-with tabs[2]:
+with tabs[3]:
     st.header("📄 PAT PDF 분석기")
     pat_file = st.file_uploader("PAT PDF 업로드", type=["pdf"], key="PAT")
 
     if pat_file:
-        data = extract_pat_percentiles_from_bytes(pat_file)
-        st.subheader("✅ 분석 결과")
-        st.write(f"**백분위:** {data['백분위']}")
-        st.write(f"**결과:** {data['결과']}")
-
-        if data["결과"]:
-            ideal_titles, ideal_texts, non_titles, non_texts = explain_results(data["결과"])
-            st.subheader(f"[이상적임] - {', '.join(ideal_titles)}")
-            for txt in ideal_texts:
-                st.write(txt)
-
-            st.subheader(f"[미흡/지나침] - {', '.join(non_titles)}")
-            for txt in non_texts:
-                st.write(txt)
-
+        job = session_job("PAT_작업", pat_file, run_pat, PAT_STAGES)
+        show_pat(wait_with_progress(job))
@@ -5,72 +5,89 @@ import os
 # === 기존 추출 함수 import ===
 from G import extract_wppsi_scores_from_page3, extract_wppsi_subtest_scores
 from F import extract_wisc_scores_from_page3, extract_wisc_subtest_scores
-from E import extract_combination_scores_from_page4, extract_subtest_scores_from_page3, subtest_name_map
+from E import extract_combination_scores_from_page4, extract_subtest_scores_from_page3
+from H import document, page_plan
+from I import cached_by_content
+from K import classify_document
+from Q import timed
+from R import IQResult
 
 # -------------------------------
-# ✅ PDF 종류 자동 감지
+# ✅ PDF 종류 자동 감지 (내용 기반, 파일명은 보조 힌트)
 # -------------------------------
-def extract_all_scores(pdf_path):
-    filename = os.path.basename(pdf_path).upper()
-    result = {"지표점수": {}, "소검사점수": {}}
-
-    if "WPPSI" in filename:
-        result["지표점수"] = extract_wppsi_scores_from_page3(pdf_path)
-        result["소검사점수"] = extract_wppsi_subtest_scores(pdf_path)
-    elif "WISC" in filename:
-        result["지표점수"] = extract_wisc_scores_from_page3(pdf_path)
-        result["소검사점수"] = extract_wisc_subtest_scores(pdf_path)
-    elif "WAIS" in filename:
-        result["지표점수"] = extract_combination_scores_from_page4(pdf_path)
-        result["소검사점수"] = extract_subtest_scores_from_page3(pdf_path, subtest_name_map)
-
-    return result, filename
+# ✅ 검사 종류 → (지표, 소검사) 추출 함수 — 분기는 이 표 한 곳에서만
+IQ_EXTRACTORS = {
+    "WPPSI": (extract_wppsi_scores_from_page3, extract_wppsi_subtest_scores),
+    "WISC": (extract_wisc_scores_from_page3, extract_wisc_subtest_scores),
+    "WAIS": (extract_combination_scores_from_page4, extract_subtest_scores_from_page3),
+}
+IQ_INSTRUMENTS = tuple(IQ_EXTRACTORS)
+# 판별용 1페이지 + 세 검사 지표/소검사 페이지 — 판별 전에 한 번만 열기 위한 로드 계획
+IQ_PAGES = sorted({0, *page_plan(*IQ_INSTRUMENTS)})
+
+def extract_all_scores(pdf_path, filename=None, instrument=None):
+    """
+    ✅ pdf_path: 경로, bytes/memoryview, BytesIO(Streamlit 업로드), PDFDocument 모두 허용
+       bytes처럼 이름이 없는 입력은 filename을 함께 넘김
+       instrument: 이미 판별한 검사 종류 (주면 다시 판별하지 않음)
+       반환: (IQResult, 대문자 파일명)
+    """
+    if filename is None:
+        filename = getattr(pdf_path, "name", None) or (pdf_path if isinstance(pdf_path, (str, os.PathLike)) else "")
+    filename = os.path.basename(filename)
+    if instrument is None:
+        return _extract_scores(pdf_path, filename)
+    return _extract_scores(pdf_path, filename, instrument)
+
+# ✅ 같은 PDF(내용 해시) + 같은 파일명이면 캐시된 결과 반환
+@cached_by_content("IQ")
+def _extract_scores(pdf_path, filename, instrument=None):
+    if instrument is not None and instrument not in IQ_INSTRUMENTS:
+        return IQResult(instrument), filename.upper()
+
+    # ✅ 한 번만 열어 판별(1페이지)과 지표/소검사 추출이 같은 문서를 공유
+    #    이미 판별된 검사면 그 검사의 페이지만 로드 (스캔본 OCR도 이 페이지들만)
+    pages = IQ_PAGES if instrument is None else page_plan(instrument)
+    with document(pdf_path, name=filename, pages=pages) as doc:
+        if instrument is None:
+            instrument = classify_document(doc).instrument
+        if instrument not in IQ_INSTRUMENTS:
+            return IQResult(instrument), filename.upper()
+
+        extract_index, extract_subtests = IQ_EXTRACTORS[instrument]
+        index = extract_index(doc)
+        subtests = extract_subtests(doc)
+
+    return IQResult(instrument, index, subtests), filename.upper()
 
 # -------------------------------
 # ✅ 지표 점수 변환 (WAIS 대응)
 # -------------------------------
+@timed("format", table="지표")
 def format_index_scores_excel(scores, is_wais=False):
+    """✅ scores: IndexScore / CompositeScore 목록"""
+    scores = {s.domain: s for s in scores}
     if is_wais:
         ordered_keys = ["전체검사", "언어이해", "지각추론", "작업기억", "처리속도"]
-        data = {"지표점수": [], "백분위": [], "진단분류": []}
-
-        for key in ordered_keys:
-            if key in scores:
-                data["지표점수"].append(scores[key].get("조합점수", ""))
-                data["백분위"].append(scores[key].get("백분위", ""))
-                data["진단분류"].append("")  # WAIS에는 진단분류가 없음
-            else:
-                data["지표점수"].append("")
-                data["백분위"].append("")
-                data["진단분류"].append("")
+        # WAIS에는 진단분류가 없음
+        rows = {k: (scores[k].조합점수, scores[k].백분위, "") for k in ordered_keys if k in scores}
     else:
         ordered_keys = ["전체IQ", "언어이해", "시공간", "유동추론", "작업기억", "처리속도"]
-        data = {"지표점수": [], "백분위": [], "진단분류": []}
-
-        for key in ordered_keys:
-            if key in scores:
-                data["지표점수"].append(scores[key].get("지표점수", ""))
-                data["백분위"].append(scores[key].get("백분위", ""))
-                data["진단분류"].append(scores[key].get("진단분류", ""))
-            else:
-                data["지표점수"].append("")
-                data["백분위"].append("")
-                data["진단분류"].append("")
-
-    df = pd.DataFrame(data, index=ordered_keys).T
-    return df
+        rows = {k: (scores[k].지표점수, scores[k].백분위, scores[k].진단분류) for k in ordered_keys if k in scores}
+
+    # ✅ 열(지표)별로 한 번에 구성, 없는 지표는 빈 칸
+    columns = {k: rows.get(k, ("", "", "")) for k in ordered_keys}
+    return pd.DataFrame(columns, index=["지표점수", "백분위", "진단분류"])
 
 # -------------------------------
 # ✅ 소검사 점수 변환
 # -------------------------------
+@timed("format", table="소검사")
 def format_subtest_scores_excel(scores):
+    """✅ scores: SubtestScore 목록"""
     grouped = {}
-    for k, v in scores.items():
-        if "_" in k:
-            domain, name = k.split("_", 1)
-        else:
-            domain, name = "기타", k
-        grouped.setdefault(domain, {})[name] = v
+    for s in scores:
+        grouped.setdefault(s.domain or "기타", {})[s.name] = s.환산점수
 
     ordered_domains = ["언어이해", "시공간", "유동추론", "지각추론", "작업기억", "처리속도", "기타"]
 
@@ -104,21 +121,17 @@ if __name__ == "__main__":
     uploaded_file = st.file_uploader("PDF 파일을 업로드하세요", type=["pdf"])
 
     if uploaded_file is not None:
-        save_path = f"./temp_{uploaded_file.name}"
-        with open(save_path, "wb") as f:
-            f.write(uploaded_file.read())
-
         st.success(f"✅ 업로드 완료: {uploaded_file.name}")
 
         with st.spinner("점수 추출 중..."):
-            scores, filename = extract_all_scores(save_path)
+            scores, filename = extract_all_scores(uploaded_file)
 
-        is_wais = "WAIS" in filename
+        is_wais = scores.instrument == "WAIS"
 
         # ✅ 지표 점수 출력
-        if scores["지표점수"]:
+        if scores.index:
             st.subheader("📌 지표 점수")
-            df_index = format_index_scores_excel(scores["지표점수"], is_wais=is_wais)
+            df_index = format_index_scores_excel(scores.index, is_wais=is_wais)
             st.dataframe(df_index.fillna(""), use_container_width=True)
 
             # ✅ 엑셀 다운로드
@@ -126,14 +139,12 @@ if __name__ == "__main__":
             st.download_button("⬇️ 지표 점수 다운로드 (CSV)", excel_index, "index_scores.csv", "text/csv")
 
         # ✅ 소검사 점수 출력
-        if scores["소검사점수"]:
+        if scores.subtests:
             st.subheader("📌 소검사 점수")
-            df_subtest = format_subtest_scores_excel(scores["소검사점수"])
+            df_subtest = format_subtest_scores_excel(scores.subtests)
             st.dataframe(df_subtest.fillna(""), use_container_width=True)
 
             # ✅ 엑셀 다운로드
             if not df_subtest.empty:
                 excel_subtest = df_subtest.to_csv(index=False).encode("utf-8-sig")
                 st.download_button("⬇️ 소검사 점수 다운로드 (CSV)", excel_subtest, "subtest_scores.csv", "text/csv")
-
-        os.remove(save_path)
@@ -1,83 +1,51 @@
 import streamlit as st
+import itertools
 import json
-import re
-import pdfplumber
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload  # ✅ 추가
-from oauth2client.service_account import ServiceAccountCredentials
-import io
-
-def load_google_service_account_key():
-    return st.secrets["gcp"]
-
-@st.cache_resource(ttl=3000, show_spinner=False)
-def get_drive_service():
-    scope = ['https://www.googleapis.com/auth/drive']
-    key_dict = load_google_service_account_key()
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(key_dict, scope)
-    return build('drive', 'v3', credentials=creds)
-
-@st.cache_data(ttl=3000, show_spinner=False)
-def load_temperament_dict_from_drive():
-    service = get_drive_service()
+import logging
+import threading
+from H import document
+from I import cached_by_content
+from U import TCI_SCALES, extract
+import L
 
-    file_id = "1TZzYppfIZB7GowdBiTf5dDYEV6_7AXbj"  # ✅ Google Drive 파일 ID
+# ✅ 기질 해석 JSON — Drive 연결/스냅샷/지연 로딩은 L에서 공통 처리
+def load_temperament_dict_from_drive():
+    data = L.load("temperament")
+    # ✅ 로드된 사전의 섹션별 매칭 인덱스와 H/M/L 조합 해석 표를 미리 생성 (이미 있으면 재사용)
+    for section in data.values():
+        if isinstance(section, dict):
+            key_matcher(section)
+    interpretation_table(data)
+    return data
 
-    request = service.files().get_media(fileId=file_id)
-    fh = io.BytesIO()
-    downloader = MediaIoBaseDownload(fh, request)
-    done = False
-    while not done:
-        status, done = downloader.next_chunk()
-    fh.seek(0)
-    return json.load(fh)
+get_temperament_dict = load_temperament_dict_from_drive
 
 
 # ---------------------------
 # 1) TCI 백분위 H/M/L 추출
 # ---------------------------
+tci_scales = list(TCI_SCALES)
+tci_codes = list(TCI_SCALES.values())
+hml_scales = tci_scales[:6]  # ✅ H/M/L 매칭 키에 쓰이는 척도
+
+def _level(p):
+    return "H" if p > 65 else "M" if p >= 35 else "L"
+
+@cached_by_content("TCI_백분위")
 def extract_tci_percentiles(pdf_path):
-    with pdfplumber.open(pdf_path) as pdf:
-        page = pdf.pages[0]
-        text = page.extract_text()
-
-    lines = text.split("\n")
-    tci_scales = [
-        "자극추구", "위험회피", "사회적 민감성", "인내력",
-        "자율성", "연대감", "자기초월", "자율성+연대감"
-    ]
-    tci_codes = ["NS", "HA", "RD", "PS", "SD", "CO", "ST", "SC"]
-
-    percentiles = {}
-    seen = set()
-    for line in lines:
-        for scale, code in zip(tci_scales, tci_codes):
-            if (scale in line or code in line) and scale not in seen:
-                nums = re.findall(r"\d+", line)
-                if len(nums) >= 3:
-                    p = int(nums[2])
-                    level = "H" if p > 65 else "M" if p >= 35 else "L"
-                    percentiles[scale] = {"percentile": p, "level": level}
-                    seen.add(scale)
-    return percentiles
+    # ✅ 척도 이름/약어 줄의 백분위 (U.py 명세), 매칭 키에 필요한 6개 척도가 모두 잡히지 않으면 pdfplumber로 다시 읽음
+    with document(pdf_path, "TCI") as doc:
+        found = extract(doc, "TCI", "백분위")["백분위"]
+    return {scale: {"percentile": p, "level": _level(p)} for scale, p in found.items()}
 
 # ---------------------------
 # 2) TCI 하위척도 M(SD) 추출
 # ---------------------------
+@cached_by_content("TCI_M(SD)")
 def extract_tci_m_sd(pdf_path):
-    with pdfplumber.open(pdf_path) as pdf:
-        page = pdf.pages[1]
-        text = page.extract_text()
-
-    lines = text.split("\n")
-    m_sd_result = {}
-    pattern = re.compile(r"([A-Z]{2}\d)\s+\d+\s+([\d.]+)\s*\(([\d.]+)\)")
-    for line in lines:
-        match = pattern.search(line)
-        if match:
-            subscale = match.group(1)
-            m_sd_result[subscale] = {"M": float(match.group(2)), "SD": float(match.group(3))}
-    return m_sd_result
+    # ✅ "NS1 원점수 M (SD)" 행, 하나도 매칭되지 않으면 pdfplumber로 다시 읽음
+    with document(pdf_path, "TCI") as doc:
+        return extract(doc, "TCI", "M(SD)")["M(SD)"]
 
 # ---------------------------
 # 3) JSON 로드
@@ -130,13 +98,156 @@ def build_matching_Summary_keys(hml: dict, m_sd: dict) -> dict:
 # ---------------------------
 # 6) JSON 유사 키 탐색
 # ---------------------------
+def _normalize_key(key: str) -> str:
+    return "".join(key.split())
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class KeyMatcher:
+    """
+    ✅ 섹션(dict) 하나에 대해 사전 로드 시 한 번 만드는 매칭 인덱스
+       - 완전 매칭: 원래 키 집합
+       - 공백 무시 매칭: 정규화 키 → 원래 키 해시 인덱스
+       - 부분 매칭: 정규화 키의 3글자 조각 역색인 → 후보를 좁힌 뒤 포함 여부 확인
+       부분 매칭 후보는 (남는 글자 수, 정규화 키) 순으로 정렬해 사전 순서와 무관하게 항상 같은 결과
+    """
+
+    def __init__(self, section: dict):
+        self._keys = set(section)
+        self._normalized = {}
+        self._trigram_index = {}
+        for key in sorted(section, key=_normalize_key):
+            norm = _normalize_key(key)
+            self._normalized.setdefault(norm, key)
+            for gram in _trigrams(norm):
+                self._trigram_index.setdefault(gram, set()).add(norm)
+
+    def candidates(self, search_key: str) -> list:
+        """✅ 검색 키를 포함하는 모든 키 (순위순)"""
+        query = _normalize_key(search_key)
+        grams = _trigrams(query)
+        if grams:
+            postings = sorted((self._trigram_index.get(g, set()) for g in grams), key=len)
+            pool = set.intersection(*postings) if postings[0] else set()
+        else:
+            pool = self._normalized.keys()  # 3글자 미만 검색어는 인덱스로 좁힐 수 없음
+        matched = sorted((n for n in pool if query in n), key=lambda n: (len(n) - len(query), n))
+        return [self._normalized[n] for n in matched]
+
+    def match(self, search_key: str) -> tuple:
+        if search_key in self._keys:
+            return search_key, "✅ 완전 매칭"
+        candidates = self.candidates(search_key)
+        if candidates:
+            return candidates[0], "🔄 유사 매칭"
+        return "", "❌ 매칭 실패"
+
+_matchers = {}  # id(섹션) → (섹션, KeyMatcher)
+_matchers_lock = threading.Lock()  # N.py 단계 스레드 풀에서 동시에 호출됨
+_MAX_MATCHERS = 64
+
+def key_matcher(section: dict) -> KeyMatcher:
+    """✅ 같은 섹션 객체에는 같은 인덱스 재사용 (사전이 다시 로드되면 새로 생성)"""
+    with _matchers_lock:
+        entry = _matchers.get(id(section))
+        if entry is None or entry[0] is not section:
+            if len(_matchers) >= _MAX_MATCHERS:
+                _matchers.pop(next(iter(_matchers)))
+            entry = (section, KeyMatcher(section))
+            _matchers[id(section)] = entry
+    return entry[1]
+
 def find_best_matching_key(search_key: str, data: dict) -> tuple:
-    if search_key in data:
-        return search_key, "✅ 완전 매칭"
-    candidates = [key for key in data if search_key.replace(" ", "") in key.replace(" ", "")]
-    if candidates:
-        return candidates[0], "🔄 유사 매칭"
-    return "", "❌ 매칭 실패"
+    return key_matcher(data).match(search_key)
+
+# ---------------------------
+# 6-1) H/M/L × 사회적 민감성 세부 유형 전체 조합 해석 표
+# ---------------------------
+LEVELS = ("H", "M", "L")
+SOCIAL_KEYS = (
+    "H(친밀+독립)", "H(거리두기+의존)", "H(친밀+의존)", "M",
+    "L(높은/적절한 정서적 감수성)", "L(typical)",
+)  # adjust_social_sensitivity()가 돌려줄 수 있는 값 전부
+
+# 섹션 → 키에 들어가는 척도 (사회적 민감성은 보정된 세부 유형)
+MATCH_PARTS = {
+    "기질1": ("자극추구", "위험회피", "인내력"),
+    "기질2": ("자극추구", "위험회피", "사회적 민감성"),
+    "성격": ("자율성", "연대감"),
+    "요약및제언1": ("자극추구", "위험회피", "인내력"),
+    "요약및제언2": ("자극추구", "위험회피", "사회적 민감성"),
+    "요약및제언3": ("자율성", "연대감"),
+}
+TEMPERAMENT_PARTS = ("기질1", "기질2", "성격")
+SUMMARY_PARTS = ("요약및제언1", "요약및제언2", "요약및제언3")
+
+def _part_key(scales, levels):
+    # build_matching_*_keys()와 같은 문자열 ("사회적 민감성" → "사회적민감성")
+    return " ".join(f"{scale.replace(' ', '')}{level}" for scale, level in zip(scales, levels))
+
+class InterpretationTable:
+    """
+    ✅ 기질 JSON 한 번 로드에 한 번 만드는 직접 조회 표
+       섹션마다 가능한 모든 H/M/L(+사회적 민감성 세부 유형) 조합 → (검색 키, 매칭 상태, 설명)
+       보고서 전체(6개 척도 × 세부 유형, 1458가지)도 섹션 결과를 묶어 미리 만들어 둠
+       → 보고서 하나의 해석 = 사회적 민감성 보정 한 번 + dict 조회 한 번
+       완전 매칭이 아닌 조합(유사 매칭/매칭 실패)은 gaps에 모아 로드 시 한 번만 경고
+    """
+
+    def __init__(self, data: dict):
+        self.rows = {}
+        self.matched_keys = {}  # (섹션, 검색 키) → 매칭된 JSON 키 (없으면 "")
+        self.gaps = []
+        for part, scales in MATCH_PARTS.items():
+            section = data.get(part, {})
+            table = self.rows[part] = {}
+            for levels in itertools.product(*self._choices(scales)):
+                key = _part_key(scales, levels)
+                matched_key, status = find_best_matching_key(key, section)
+                table[levels] = (key, status, section.get(matched_key, "❌ 설명 없음"))
+                self.matched_keys[part, key] = matched_key
+                if status != "✅ 완전 매칭":
+                    self.gaps.append((part, key, status, matched_key))
+
+        self.reports = {}  # (hml_scales 순서의 수준, 사회적 민감성은 세부 유형) → {섹션: 행} (공유, 수정 금지)
+        for levels in itertools.product(*self._choices(hml_scales)):
+            values = dict(zip(hml_scales, levels))
+            self.reports[levels] = {
+                part: self.rows[part][tuple(values[s] for s in scales)]
+                for part, scales in MATCH_PARTS.items()
+            }
+
+    @staticmethod
+    def _choices(scales):
+        return [SOCIAL_KEYS if s == "사회적 민감성" else LEVELS for s in scales]
+
+    def lookup(self, hml: dict, m_sd: dict) -> dict:
+        """✅ 섹션 → (검색 키, 매칭 상태, 설명)"""
+        social_key = adjust_social_sensitivity(hml, m_sd)
+        return self.reports[tuple(social_key if s == "사회적 민감성" else hml[s] for s in hml_scales)]
+
+    def report_gaps(self):
+        exact = sum(len(rows) for rows in self.rows.values()) - len(self.gaps)
+        logger = logging.getLogger(__name__)
+        logger.info("기질 해석 표: 완전 매칭 %d개, 유사/실패 %d개", exact, len(self.gaps))
+        for part, key, status, matched_key in self.gaps:
+            logger.warning("기질 해석 표 [%s] %s → %s %s", part, key, status, matched_key or "")
+
+_tables = {}  # id(사전) → (사전, InterpretationTable)
+_tables_lock = threading.Lock()  # 표 생성도 잠금 안에서 → 동시에 요청돼도 한 번만 만듦
+
+def interpretation_table(data: dict) -> InterpretationTable:
+    """✅ 같은 사전 객체에는 같은 표 재사용 (사전이 다시 로드되면 새로 만들고 커버리지 경고)"""
+    with _tables_lock:
+        entry = _tables.get(id(data))
+        if entry is None or entry[0] is not data:
+            if len(_tables) >= _MAX_MATCHERS:
+                _tables.pop(next(iter(_tables)))
+            entry = (data, InterpretationTable(data))
+            entry[1].report_gaps()
+            _tables[id(data)] = entry
+    return entry[1]
 
 # ---------------------------
 # 7) Streamlit UI
@@ -145,15 +256,13 @@ def main():
     st.title("📊 TCI 결과 분석 (웹버전)")
     pdf_file = st.file_uploader("📄 PDF 파일 업로드", type=["pdf"])
 
-    # ✅ JSON 파일은 고정 사용
-    data = load_temperament_dict_from_drive()
-
     if pdf_file:
-        with open("temp.pdf", "wb") as f:
-            f.write(pdf_file.read())
+        # ✅ JSON 파일은 고정 사용 (업로드가 있을 때만 로드)
+        data = get_temperament_dict()
 
-        percentiles = extract_tci_percentiles("temp.pdf")
-        m_sd = extract_tci_m_sd("temp.pdf")
+        with document(pdf_file, "TCI") as doc:
+            percentiles = extract_tci_percentiles(doc)
+            m_sd = extract_tci_m_sd(doc)
 
         hml_values = {
             "자극추구": percentiles.get("자극추구", {}).get("level", "M"),
@@ -167,34 +276,37 @@ def main():
         st.subheader("✅ 추출된 H/M/L 값")
         st.json(hml_values)
 
-        matching_keys = build_matching_Temperament_keys(hml_values, m_sd)
+        # ✅ 전체 조합 해석 표에서 조회 (섹션마다 키 검색을 다시 하지 않음)
+        table = interpretation_table(data)
+        found = table.lookup(hml_values, m_sd)
+
         st.subheader("🔍 매칭 키")
-        st.json(matching_keys)
+        st.json({part: found[part][0] for part in TEMPERAMENT_PARTS})
 
         st.subheader("📌 최종 결과")
-        for part, key in matching_keys.items():
-            matched_key, status = find_best_matching_key(key, data.get(part, {}))
+        for part in TEMPERAMENT_PARTS:
+            key, status, text = found[part]
+            matched_key = table.matched_keys[part, key]
             st.markdown(f"### **[{part}]**")
             st.write(f"- **추출된 키**: {key}")
             st.write(f"- **매칭된 키**: {matched_key if matched_key else '없음'}")
             st.write(f"- **매칭 상태**: {status}")
             if matched_key:
-                st.success(data[part][matched_key])
+                st.success(text)
             else:
                 st.error("❌ 해당 키에 대한 설명이 없습니다.")
 
-        matching_keys = build_matching_Summary_keys(hml_values, m_sd)
         # ✅ 요약 및 제언 추가
         st.subheader("📝 요약 및 제언")
-        for part, key in matching_keys.items():
-            summary_dict = data.get(f"{part}", {})
-            matched_key, status = find_best_matching_key(key, summary_dict)
+        for part in SUMMARY_PARTS:
+            key, status, text = found[part]
+            matched_key = table.matched_keys[part, key]
             st.markdown(f"### **[{part}]**")
             st.write(f"- **추출된 키**: {key}")
             st.write(f"- **매칭된 키**: {matched_key if matched_key else '없음'}")
             st.write(f"- **매칭 상태**: {status}")
             if matched_key:
-                st.info(summary_dict[matched_key])
+                st.info(text)
             else:
                 st.warning("❌ 요약 내용이 없습니다.")
 
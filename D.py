@@ -1,40 +1,21 @@
 import streamlit as st
-import pdfplumber
-import re
-import json
-from googleapiclient.discovery import build
-from oauth2client.service_account import ServiceAccountCredentials
-import io
-from googleapiclient.http import MediaIoBaseDownload
-
-def load_google_service_account_key():
-    return st.secrets["gcp"]
-
-# ✅ Google Drive 연결 함수
-@st.cache_resource(ttl=3000, show_spinner=False)
-def get_drive_service():
-    scope = ['https://www.googleapis.com/auth/drive']
-    key_dict = load_google_service_account_key()
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(key_dict, scope)
-    return build('drive', 'v3', credentials=creds)
-
-# ✅ Google Drive에서 판단별_설명.json 로드
-@st.cache_data(ttl=3000, show_spinner=False)
+from H import document
+from I import cached_by_content
+from U import extract
+import L
+import numpy as np
+
+# ✅ 판단별_설명.json — Drive 연결/스냅샷/지연 로딩은 L에서 공통 처리
 def load_explain_data_from_drive():
-    service = get_drive_service()
-    file_id = "1n17KiyaQ5cp_xFjgzFtmrE2Hvoqh5aXC"
+    return L.load("pat_explain")
 
-    request = service.files().get_media(fileId=file_id)
-    fh = io.BytesIO()
-    downloader = MediaIoBaseDownload(fh, request)
-    done = False
-    while not done:
-        status, done = downloader.next_chunk()
-    fh.seek(0)
-    return json.load(fh)
+get_explain_data = load_explain_data_from_drive
 
-# ✅ 기존 로컬 파일 대신 Drive에서 로드
-explain_data = load_explain_data_from_drive()
+def __getattr__(name):
+    # ✅ 기존 `from D import explain_data` 호환
+    if name == "explain_data":
+        return get_explain_data()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ✅ 이상적 범위
 ideal_ranges = {
@@ -49,33 +30,71 @@ ideal_ranges = {
 }
 factors_order = list(ideal_ranges.keys())
 
+# ✅ 판단 코드 — 열 번호가 코드 (-1: 백분위 누락/NaN)
+CATEGORIES = ("미흡함", "이상적임", "지나침")
+MISSING = -1
+MISSING_LABEL = "누락"  # 설명 없음 (explain_results에서 건너뜀)
+_LOW = np.array([low for low, _ in ideal_ranges.values()], dtype=np.float32)
+_HIGH = np.array([high for _, high in ideal_ranges.values()], dtype=np.float32)
+
+def evaluate_batch(percentiles):
+    """✅ N×8 백분위 배열 → N×8 판단 코드(int8) — 보고서 수와 무관하게 비교 두 번"""
+    values = np.asarray(percentiles, dtype=np.float32)
+    if values.ndim != 2 or values.shape[1] != len(factors_order):
+        raise ValueError(f"백분위 배열은 N×{len(factors_order)} 이어야 합니다: {values.shape}")
+    # 하한 이상이면 +1, 상한 초과면 +1 → 미흡함 0 / 이상적임 1 / 지나침 2
+    codes = (values >= _LOW).astype(np.int8) + (values > _HIGH)
+    codes[np.isnan(values)] = MISSING
+    return codes
+
 def evaluate_results(percentiles):
-    results = []
-    for i, value in enumerate(percentiles):
-        low, high = ideal_ranges[factors_order[i]]
-        if value < low:
-            results.append("미흡함")
-        elif value > high:
-            results.append("지나침")
-        else:
-            results.append("이상적임")
-    return results
-
-# ✅ PDF에서 백분위 추출 (텍스트 기반)
+    # MISSING(-1)을 그대로 인덱스로 쓰면 CATEGORIES[-1]("지나침")이 되므로 따로 표시
+    return [MISSING_LABEL if code == MISSING else CATEGORIES[code] for code in evaluate_batch([percentiles])[0]]
+
+def percentile_matrix(records):
+    """✅ J.py 배치 결과 레코드 중 PAT 성공 건 → (파일 목록, N×8 float32 배열)"""
+    files, rows = [], []
+    for record in records:
+        numbers = record["result"].get("백분위", []) if record.get("instrument") == "PAT" else []
+        if record.get("status") == "ok" and len(numbers) == len(factors_order):
+            files.append(record["file"])
+            rows.append(numbers)
+    return files, np.array(rows, dtype=np.float32).reshape(-1, len(factors_order))
+
+# ✅ PDF에서 백분위 추출 (텍스트 기반, U.py 명세) — 8개 백분위가 잡히지 않으면 pdfplumber로 다시 읽음
+@cached_by_content("PAT")
 def extract_pat_percentiles_from_bytes(pdf_bytes):
-    with pdfplumber.open(pdf_bytes) as pdf:
-        page = pdf.pages[2]  # ✅ 기존 page_num=2 유지
-        text = page.extract_text()
-
-    seq_match = re.search(r"(\d+\s+){7}\d+", text)
-    numbers = []
-    if seq_match:
-        numbers = [int(n) for n in re.findall(r"\d+", seq_match.group()) if 10 <= int(n) <= 100]
+    with document(pdf_bytes, "PAT") as doc:
+        numbers = extract(doc, "PAT", "백분위")["백분위"]
 
     evaluated = evaluate_results(numbers) if len(numbers) == 8 else []
     return {"백분위": numbers, "결과": evaluated}
 
+_explain_table = (None, None)
+
+def explain_table():
+    """
+    ✅ 8(요인) × 4(미흡함/이상적임/지나침/누락) 설명 문장 표 — 설명 JSON이 바뀔 때만 다시 만듦
+       마지막 열은 None → 코드 -1(MISSING)이 그대로 인덱스로 쓰임
+    """
+    global _explain_table
+    data = get_explain_data()
+    cached, table = _explain_table
+    if cached is not data:
+        table = np.empty((len(factors_order), len(CATEGORIES) + 1), dtype=object)
+        for i, key in enumerate(factors_order):
+            for j, category in enumerate(CATEGORIES):
+                table[i, j] = data[key][category]
+        _explain_table = (data, table)
+    return table
+
+def explain_batch(codes):
+    """✅ evaluate_batch() 코드 → N×8 설명 배열 (같은 문자열 객체를 가리키는 참조, 보고서별 복사 없음)"""
+    codes = np.asarray(codes)
+    return explain_table()[np.arange(len(factors_order)), codes]
+
 def explain_results(evaluated):
+    explain_data = get_explain_data()
     ideal_titles, ideal_texts, non_titles, non_texts = [], [], [], []
     for key, value in zip(factors_order, evaluated):
         if value == "이상적임":
@@ -0,0 +1,412 @@
+import hashlib
+import io
+import logging
+import os
+from contextlib import contextmanager
+
+import pdfplumber
+
+import M
+import Q
+
+try:
+    import pymupdf
+except ImportError:  # pymupdf 미설치 환경에서는 pdfplumber만 사용
+    pymupdf = None
+
+# -------------------------------
+# ✅ 텍스트 추출 백엔드
+# -------------------------------
+def word_rows(words, y_tolerance=3):
+    """✅ 단어 좌표를 줄 단위로 묶음 (위→아래, 같은 줄은 왼쪽→오른쪽)"""
+    lines = []
+    current = []
+    top = None
+    for w in sorted(words, key=lambda w: (w["top"], w["x0"])):
+        if current and abs(w["top"] - top) > y_tolerance:
+            lines.append(current)
+            current = []
+        if not current:
+            top = w["top"]
+        current.append(w)
+    if current:
+        lines.append(current)
+    return [sorted(line, key=lambda w: w["x0"]) for line in lines]
+
+
+def _words_to_text(words, y_tolerance=3):
+    """✅ pdfplumber.extract_text()와 같은 형태로 복원 (단어 사이는 공백 하나)"""
+    return "\n".join(" ".join(w["text"] for w in line) for line in word_rows(words, y_tolerance))
+
+
+def column_values(words, header, labels, x_tolerance=4):
+    """
+    ✅ 단어 좌표로 표에서 header 열의 정수 값을 행 이름(labels)별로 읽음
+       - 줄 번호가 아니라 행 이름 단어로 행을 찾으므로 줄이 밀리거나 끼어들어도 동일
+       - header 단어의 x 범위와 겹치는 정수만 그 열의 값으로 인정
+       반환: {label: int} — 머리글이 없거나 값이 없는 행은 빠짐
+       K-WISC/K-WPPSI 소검사 표는 U.subtest_column이 이 함수 → 줄 번호 방식 순으로 읽음
+    """
+    rows = word_rows(words)
+    for i, row in enumerate(rows):
+        heads = [w for w in row if w["text"] == header]
+        if heads:
+            head = heads[0]
+            break
+    else:
+        return {}
+
+    left, right = head["x0"] - x_tolerance, head["x1"] + x_tolerance
+    wanted = set(labels)
+    result = {}
+    for row in rows[i + 1:]:
+        label = next((w["text"] for w in row if w["text"] in wanted and w["x1"] < left), None)
+        if label is None or label in result:
+            continue
+        for w in row:
+            center = (w["x0"] + w["x1"]) / 2
+            if left <= center <= right and w["text"].isdigit():
+                result[label] = int(w["text"])
+                break
+    return result
+
+
+class PyMuPDFBackend:
+    """✅ MuPDF(C 엔진) 기반 빠른 경로"""
+
+    name = "pymupdf"
+
+    def __init__(self, path=None, data=None, pages=None):
+        # MuPDF는 load_page 시점에만 페이지를 파싱하므로 pages 제한이 따로 필요 없음
+        if path is not None:
+            self._doc = pymupdf.open(path)
+        else:
+            self._doc = pymupdf.open(stream=data, filetype="pdf")
+
+    @property
+    def page_count(self):
+        return self._doc.page_count
+
+    @property
+    def metadata(self):
+        return {k: v for k, v in (self._doc.metadata or {}).items() if isinstance(v, str) and v}
+
+    def page_words(self, index):
+        page = self._doc.load_page(index)
+        return [
+            {"text": w[4], "x0": w[0], "top": w[1], "x1": w[2], "bottom": w[3]}
+            for w in page.get_text("words", sort=True)
+        ]
+
+    def page_text(self, index):
+        return _words_to_text(self.page_words(index))
+
+    def is_scanned(self, index):
+        return bool(self._doc.load_page(index).get_image_info())
+
+    def submit_ocr(self, index):
+        return M.submit(self._doc.load_page(index))
+
+    def release(self, index):
+        # 페이지 객체는 호출마다 새로 만들고 버리므로 MuPDF 저장소(글꼴/이미지 캐시)만 줄임
+        # 저장소는 프로세스 전체 공용 → 모두 비우면 동시에 열린 다른 문서 캐시도 사라지므로
+        # 오래 안 쓴 항목부터 절반만 내보냄 (STORE_SHRINK_PERCENT)
+        pymupdf.TOOLS.store_shrink(STORE_SHRINK_PERCENT)
+
+    def close(self):
+        self._doc.close()
+
+
+class PdfplumberBackend:
+    """✅ pdfminer 기반 기존 경로 (검증 실패 시 폴백)"""
+
+    name = "pdfplumber"
+
+    def __init__(self, path=None, data=None, pages=None):
+        # ✅ pages가 주어지면 해당 페이지 객체만 생성 (pdfplumber는 1-based)
+        self._pdf = pdfplumber.open(
+            path if path is not None else io.BytesIO(data),
+            pages=[p + 1 for p in pages] if pages is not None else None,
+        )
+        self._position = {p: i for i, p in enumerate(pages)} if pages is not None else None
+
+    @property
+    def page_count(self):
+        return len(self._pdf.pages)
+
+    @property
+    def metadata(self):
+        return {k.lower(): v for k, v in self._pdf.metadata.items() if isinstance(v, str) and v}
+
+    def _page(self, index):
+        if self._position is not None:
+            index = self._position[index]
+        return self._pdf.pages[index]
+
+    def page_words(self, index):
+        return self._page(index).extract_words()
+
+    def page_text(self, index):
+        return self._page(index).extract_text() or ""
+
+    def release(self, index):
+        """✅ 페이지 레이아웃/객체 캐시와 pdfminer 글꼴·객체 캐시 해제 (다음 페이지는 다시 파싱)"""
+        self._page(index).close()
+        # pdfminer 내부 속성이라 버전에 따라 없을 수 있음 → 있는 캐시만 비움
+        for owner, attr in (
+            (getattr(self._pdf, "rsrcmgr", None), "_cached_fonts"),
+            (getattr(self._pdf, "doc", None), "_cached_objs"),
+            (getattr(self._pdf, "doc", None), "_parsed_objs"),
+        ):
+            cache = getattr(owner, attr, None)
+            if hasattr(cache, "clear"):
+                cache.clear()
+
+    def close(self):
+        self._pdf.close()
+
+
+BACKENDS = {"pdfplumber": PdfplumberBackend}
+if pymupdf is not None:
+    BACKENDS["pymupdf"] = PyMuPDFBackend
+
+DEFAULT_BACKEND = "pymupdf" if pymupdf is not None else "pdfplumber"
+FALLBACK_BACKEND = "pdfplumber"
+OCR_BACKEND = "ocr"  # page_backend에 기록되는 이름 (렌더링은 pymupdf)
+
+# ✅ 메모리 제한 모드 — 필요한 페이지를 추출한 직후 백엔드의 페이지/레이아웃 캐시를 해제
+#    문서 하나가 잡는 메모리가 페이지 하나 분량을 넘지 않음 (같은 페이지를 다시 읽으면 재파싱)
+#    pymupdf의 글꼴/이미지 저장소는 프로세스 전체 공용 — 해제 시 STORE_SHRINK_PERCENT만큼(LRU 순) 줄임
+LOW_MEMORY = os.environ.get("PDF_LOW_MEMORY", "0") == "1"
+STORE_SHRINK_PERCENT = int(os.environ.get("PDF_STORE_SHRINK_PERCENT", "50"))
+
+# -------------------------------
+# ✅ 검사별 필요한 페이지 (0-based) — 추출 함수는 여기서만 페이지 번호를 가져옴
+# -------------------------------
+INSTRUMENT_PAGES = {
+    "WPPSI": {"표지": 0, "소검사": 1, "지표": 2},  # 표지: 4세 이상/미만 판별
+    "WISC": {"소검사": 1, "지표": 2},
+    "WAIS": {"소검사": 2, "지표": 3},
+    "TCI": {"백분위": 0, "M(SD)": 1},
+    "PAT": {"백분위": 2},
+}
+
+
+def page_plan(*instruments):
+    """✅ 여러 검사를 한 문서에서 추출할 때 필요한 최소 페이지 집합"""
+    return sorted({p for inst in instruments for p in INSTRUMENT_PAGES[inst].values()})
+
+# -------------------------------
+# ✅ PDF 문서 세션 (한 번 열고 페이지 결과 캐시)
+# -------------------------------
+class PDFDocument:
+    """
+    ✅ 보고서 PDF를 한 번만 열고, 페이지별 텍스트/단어 배치를 캐시
+       모든 추출 함수는 경로 대신 이 객체를 그대로 받을 수 있음
+       기본은 PyMuPDF로 읽고, 파서 검증(validate)에 실패한 페이지만 pdfplumber로 다시 읽음
+       pages(page_plan 결과)가 주어지면 그 밖의 페이지는 파싱하지 않음
+       텍스트 레이어가 없는 스캔 페이지는 OCR(M.py) 결과를 같은 형태로 돌려줌
+       low_memory(기본: PDF_LOW_MEMORY)면 페이지마다 추출 후 백엔드 캐시를 바로 해제
+    """
+
+    def __init__(self, source, name=None, backend=None, pages=None, low_memory=None):
+        self.name = name or _source_name(source)
+        self.pages = pages
+        self.low_memory = LOW_MEMORY if low_memory is None else low_memory
+        self._path, self._data = _read_source(source)
+        Q.inc("pdf_documents_total")
+        Q.inc("pdf_bytes_total", os.path.getsize(self._path) if self._path is not None else memoryview(self._data).nbytes)
+        self._backends = {}
+        self._primary = self._backend(backend or DEFAULT_BACKEND)
+        self._text = {}
+        self._words = {}
+        self._layer = {}  # 텍스트 레이어 원문 (OCR 필요 여부 판단용)
+        self._ocr = {}  # 페이지 → OCR Future
+        self._digest = None
+        self.page_backend = {}  # ✅ 페이지 인덱스 → 텍스트를 제공한 백엔드 이름
+
+    @property
+    def digest(self):
+        """✅ PDF 원본 바이트의 SHA-256 (결과 캐시 키)"""
+        if self._digest is None:
+            self._digest = _digest(self._path, self._data)
+        return self._digest
+
+    def _backend(self, name):
+        if name not in self._backends:
+            with Q.stage("open", backend=name):
+                self._backends[name] = BACKENDS[name](self._path, self._data, self.pages)
+        return self._backends[name]
+
+    @property
+    def page_count(self):
+        return self._primary.page_count
+
+    @property
+    def metadata(self):
+        """✅ 제목/주제/키워드 등 문서 정보 (페이지 파싱 없이 읽음)"""
+        return self._primary.metadata
+
+    def page_text(self, index, validate=None):
+        """
+        ✅ validate(text) -> bool 이 주어지면 빠른 경로 결과를 검증하고,
+           실패 시 pdfplumber 결과로 교체 (한 번 교체된 페이지는 다시 검사하지 않음)
+        """
+        self._check_page(index)
+        if index not in self._text:
+            text = self._layer_text(index)
+            self.page_backend[index] = self._primary.name
+            if M.needs_ocr(text) and self._ocr_words(index) is not None:
+                text = _words_to_text(self._words[index])
+                self.page_backend[index] = OCR_BACKEND
+            self._text[index] = text
+
+        if (
+            validate is not None
+            and self.page_backend[index] not in (FALLBACK_BACKEND, OCR_BACKEND)
+            and not validate(self._text[index])
+        ):
+            fallback = self._backend(FALLBACK_BACKEND)
+            with Q.stage("extract_text", backend=FALLBACK_BACKEND):
+                self._text[index] = fallback.page_text(index)
+            Q.inc("pdf_pages_total", backend=FALLBACK_BACKEND)
+            self._release(fallback, index)
+            self.page_backend[index] = FALLBACK_BACKEND
+        return self._text[index]
+
+    def page_lines(self, index, validate=None):
+        return self.page_text(index, validate).split("\n")
+
+    def page_words(self, index):
+        self._check_page(index)
+        if index not in self._words:
+            with Q.stage("extract_words", backend=self._primary.name):
+                words = self._primary.page_words(index)
+            Q.inc("pdf_pages_total", backend=self._primary.name)
+            self._release(self._primary, index)
+            self._words[index] = words
+            if M.needs_ocr(" ".join(w["text"] for w in words)):
+                self._ocr_words(index)  # 성공하면 self._words[index]를 OCR 단어로 교체
+        return self._words[index]
+
+    def _layer_text(self, index):
+        if index not in self._layer:
+            with Q.stage("extract_text", backend=self._primary.name):
+                self._layer[index] = self._primary.page_text(index)
+            Q.inc("pdf_pages_total", backend=self._primary.name)
+            self._release(self._primary, index)
+        return self._layer[index]
+
+    def _release(self, backend, index):
+        if self.low_memory:
+            with Q.stage("release", backend=backend.name):
+                backend.release(index)
+
+    def _ocr_words(self, index):
+        """
+        ✅ 스캔 페이지 OCR — 처음 필요해질 때 로드 계획의 다른 스캔 페이지도 함께 제출해 병렬 인식
+           OCR을 쓸 수 없거나 실패하면 None (기존처럼 빈 텍스트로 진행)
+        """
+        if not M.available() or "pymupdf" not in BACKENDS:
+            return None
+        renderer = self._backend("pymupdf")
+        if index not in self._ocr:
+            if not renderer.is_scanned(index):
+                return None  # 이미지도 없는 페이지 (표지 등 원래 글자가 적은 페이지)
+            for p in self.pages or [index]:
+                if p not in self._ocr and (p == index or (M.needs_ocr(self._layer_text(p)) and renderer.is_scanned(p))):
+                    self._ocr[p] = renderer.submit_ocr(p)
+        try:
+            with Q.stage("ocr"):
+                words = self._ocr[index].result(timeout=M.OCR_TIMEOUT)
+        except Exception:
+            logging.getLogger(__name__).warning("%s %d페이지 OCR 실패", self.name, index, exc_info=True)
+            return None
+        self._words[index] = words
+        return words
+
+    def _check_page(self, index):
+        if self.pages is not None and index not in self.pages:
+            raise IndexError(f"{index}페이지는 로드 계획 {self.pages}에 없습니다.")
+
+    def close(self):
+        for future in self._ocr.values():
+            future.cancel()
+        for b in self._backends.values():
+            b.close()
+        self._backends.clear()
+        self._data = None  # ✅ 업로드 버퍼(memoryview) 참조 해제
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _source_name(source):
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.basename(os.fspath(source))
+    return getattr(source, "name", "") or ""
+
+
+def _read_source(source):
+    """
+    ✅ (경로, 바이트) 중 하나로 정규화 — 두 백엔드가 같은 입력을 공유
+       bytes/memoryview와 BytesIO(Streamlit 업로드 포함)는 복사 없이 그대로 넘김
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source), None
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return None, source
+    if hasattr(source, "getbuffer"):
+        return None, source.getbuffer()
+    if hasattr(source, "getvalue"):
+        return None, source.getvalue()
+    pos = source.tell()
+    data = source.read()
+    source.seek(pos)  # ✅ 해시 계산 후에도 같은 파일 객체를 다시 읽을 수 있게
+    return None, data
+
+
+def _digest(path, data):
+    h = hashlib.sha256()
+    if path is not None:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    else:
+        h.update(data)
+    return h.hexdigest()
+
+
+def content_digest(source):
+    """✅ 경로/바이트/업로드/PDFDocument 어느 입력이든 같은 내용이면 같은 해시"""
+    if isinstance(source, PDFDocument):
+        return source.digest
+    return _digest(*_read_source(source))
+
+
+def open_document(source, *instruments, name=None, backend=None, low_memory=None, pages=None):
+    if isinstance(source, PDFDocument):
+        return source
+    if pages is None and instruments:
+        pages = page_plan(*instruments)
+    return PDFDocument(source, name=name, backend=backend, pages=pages, low_memory=low_memory)
+
+
+@contextmanager
+def document(source, *instruments, name=None, pages=None):
+    """
+    ✅ 경로/파일객체/PDFDocument 모두 허용
+       instruments가 주어지면 해당 검사에 필요한 페이지만 로드 (pages로 직접 지정 가능)
+       이미 열린 PDFDocument는 호출자가 소유하므로 여기서 닫지 않음
+    """
+    if isinstance(source, PDFDocument):
+        yield source
+        return
+    doc = open_document(source, *instruments, name=name, pages=pages)
+    try:
+        yield doc
+    finally:
+        doc.close()
@@ -0,0 +1,127 @@
+import copy
+import hashlib
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from H import content_digest
+import Q
+
+# -------------------------------
+# ✅ 파서 버전 — 추출 결과 형태가 바뀌면 올려서 기존 캐시를 무효화
+# -------------------------------
+PARSER_VERSION = "5"
+
+# -------------------------------
+# ✅ PDF 내용 해시 기반 결과 캐시 (메모리 LRU + 선택적 디스크)
+# -------------------------------
+class ResultCache:
+    """
+    ✅ 같은 PDF를 다시 올리면 파싱 없이 최종 점수 결과를 돌려줌
+       - 메모리: max_entries개까지 LRU로 보관
+       - 디스크: cache_dir가 주어지면 pickle로 저장 → 앱 재시작 후에도 유지
+    """
+
+    def __init__(self, max_entries=256, cache_dir=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".pkl")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, copy.deepcopy(self._entries[key])
+
+        if self.cache_dir:
+            try:
+                with open(self._disk_path(key), "rb") as f:
+                    value = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                pass
+            else:
+                self._remember(key, value)
+                with self._lock:
+                    self.hits += 1
+                return True, copy.deepcopy(value)
+
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def put(self, key, value):
+        value = copy.deepcopy(value)
+        self._remember(key, value)
+        if self.cache_dir:
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)  # ✅ 원자적 교체 (동시 쓰기에도 깨진 파일 없음)
+            except OSError:
+                # ✅ 디스크 계층은 보조 — 디스크가 가득 차거나 읽기 전용이어도 추출 결과는 그대로 반환
+                logging.getLogger(__name__).warning("결과 캐시 디스크 저장 실패: %s", path, exc_info=True)
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# ✅ SCORE_CACHE_DIR 환경변수가 있으면 디스크 계층도 사용
+result_cache = ResultCache(
+    max_entries=int(os.environ.get("SCORE_CACHE_SIZE", "256")),
+    cache_dir=os.environ.get("SCORE_CACHE_DIR") or None,
+)
+
+
+def cache_key(kind, pdf_source, *args, **kwargs):
+    extra = repr((args, sorted(kwargs.items()))) if args or kwargs else ""
+    return f"{kind}:{PARSER_VERSION}:{content_digest(pdf_source)}:{extra}"
+
+
+def cached_by_content(kind):
+    """
+    ✅ 첫 인자가 PDF(경로/바이트/업로드/PDFDocument)인 추출 함수에 붙이는 데코레이터
+       나머지 인자(filename 등)도 키에 포함
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(pdf_source, *args, **kwargs):
+            key = cache_key(kind, pdf_source, *args, **kwargs)
+            found, value = result_cache.get(key)
+            Q.inc("result_cache_total", kind=kind, result="hit" if found else "miss")
+            if found:
+                return value
+            value = func(pdf_source, *args, **kwargs)
+            result_cache.put(key, value)
+            return value
+
+        wrapper.uncached = func
+        return wrapper
+
+    return decorator
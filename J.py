@@ -0,0 +1,424 @@
+import argparse
+import csv
+import io
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import H
+from H import document
+from K import classify
+import M
+import Q
+
+# -------------------------------
+# ✅ 폴더 일괄 처리 (헤드리스 CLI)
+#    python J.py <폴더> -o results.jsonl [--format csv|parquet] [--workers N] [--resume]
+#    python J.py <폴더> --queue jobs.db -o results.jsonl   ← SQLite 작업 큐 (재시도/백오프, T.py)
+# -------------------------------
+def extract_file(path, instrument):
+    """✅ 검사 종류에 맞는 추출 함수 실행 — 프로세스 풀 워커에서 호출"""
+    if instrument in ("WPPSI", "WISC", "WAIS"):
+        from B import extract_all_scores
+        scores, _ = extract_all_scores(path, instrument=instrument)  # 이미 판별한 종류를 넘겨 다시 판별하지 않음
+        return scores.to_dict()
+    if instrument == "TCI":
+        from C import extract_tci_percentiles, extract_tci_m_sd
+        with document(path, "TCI") as doc:
+            return {"백분위": extract_tci_percentiles(doc), "M(SD)": extract_tci_m_sd(doc)}
+    if instrument == "PAT":
+        from D import extract_pat_percentiles_from_bytes
+        with open(path, "rb") as f:
+            return extract_pat_percentiles_from_bytes(f.read())
+    raise ValueError(f"지원하지 않는 검사 종류: {instrument}")
+
+
+def process_file(path):
+    started = time.perf_counter()
+    record = {"file": path, "instrument": None, "confidence": 0.0, "status": "ok", "error": "", "result": {}}
+    try:
+        # ✅ 1페이지만 읽는 내용 기반 판별 후 전체 추출
+        found = classify(path)
+        record["instrument"], record["confidence"] = found.instrument, found.confidence
+        if record["instrument"] is None:
+            raise ValueError("검사 종류를 판별할 수 없습니다.")
+        record["result"] = extract_file(path, record["instrument"])
+    except Exception as e:  # ✅ 한 파일 실패가 전체 배치를 멈추지 않도록 기록만 남김
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = round(time.perf_counter() - started, 4)
+    return record
+
+
+def find_pdfs(folder, recursive=False):
+    if recursive:
+        for root, _, files in os.walk(folder):
+            for name in sorted(files):
+                if name.lower().endswith(".pdf"):
+                    yield os.path.join(root, name)
+    else:
+        for name in sorted(os.listdir(folder)):
+            if name.lower().endswith(".pdf"):
+                yield os.path.join(folder, name)
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+# -------------------------------
+# ✅ 결과 스트리밍 기록 (파일 하나 끝날 때마다 바로 씀)
+# -------------------------------
+def flatten_result(result, prefix=""):
+    """✅ 중첩 결과를 (항목, 값) 행으로 펼침 — CSV는 검사 종류와 무관하게 같은 헤더 사용"""
+    if isinstance(result, dict):
+        for k, v in result.items():
+            yield from flatten_result(v, f"{prefix}{k}_")
+    elif isinstance(result, (list, tuple)):
+        for i, v in enumerate(result):
+            yield from flatten_result(v, f"{prefix}{i}_")
+    else:
+        yield prefix.rstrip("_"), result
+
+
+RECORD_FIELDS = ("file", "instrument", "confidence", "status", "error", "seconds")
+
+
+class JsonlWriter:
+    def __init__(self, f, header=True):
+        self._f = f
+
+    def write(self, record):
+        self._f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._f.flush()
+
+
+class CsvWriter:
+    fieldnames = list(RECORD_FIELDS) + ["항목", "값"]
+
+    def __init__(self, f, header=True):
+        self._f = f
+        self._writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+        if header:
+            self._writer.writeheader()
+
+    def write(self, record):
+        base = {k: record[k] for k in RECORD_FIELDS}
+        rows = list(flatten_result(record["result"])) or [("", "")]
+        # ✅ 한 보고서의 행을 모아 한 번에 씀 (중간에 끊겨도 저널 기준으로 잘라내면 됨)
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=self.fieldnames)
+        for item, value in rows:
+            writer.writerow({**base, "항목": item, "값": "" if value is None else value})
+        self._f.write(buf.getvalue())
+        self._f.flush()
+
+
+WRITERS = {"jsonl": JsonlWriter, "csv": CsvWriter}
+
+# -------------------------------
+# ✅ 재개 가능한 출력 — <출력>.journal에 커밋된 파일과 그 시점의 출력 크기를 기록
+#    중단 후 --resume: 마지막 커밋 크기로 출력을 잘라내고(반쯤 쓴 행 제거) 커밋된 파일은 건너뜀
+#    출력이 사라졌으면 저널을 초기화 (커밋된 결과를 조용히 잃지 않도록)
+# -------------------------------
+class CommitJournal:
+    def __init__(self, path):
+        self.path = path
+
+    def repair(self):
+        """✅ 쓰다 끊긴 마지막 줄(줄바꿈 없음)을 잘라냄 — 다음 커밋이 그 조각에 이어 붙어 같이 깨지지 않도록"""
+        try:
+            with open(self.path, "rb+") as f:
+                end = f.seek(0, os.SEEK_END)
+                position = end
+                while position > 0:
+                    start = max(0, position - 65536)
+                    f.seek(start)
+                    chunk = f.read(position - start)
+                    newline = chunk.rfind(b"\n")
+                    if newline >= 0:
+                        position = start + newline + 1
+                        break
+                    position = start
+                if position < end:
+                    f.truncate(position)
+        except FileNotFoundError:
+            pass
+
+    def entries(self):
+        """✅ 커밋 항목을 순서대로 — 깨진 줄은 그 줄만 건너뜀 (뒤에 이어진 커밋은 그대로 읽음)"""
+        try:
+            f = open(self.path, encoding="utf-8", errors="replace")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict) and isinstance(entry.get("files"), list):
+                    yield entry
+
+    def load(self):
+        """✅ (커밋된 파일 집합, 마지막 커밋 시점 출력 크기, 커밋 횟수)"""
+        self.repair()
+        done, offset, commits = set(), 0, 0
+        for entry in self.entries():
+            done.update(entry["files"])
+            offset = entry.get("offset") or offset
+            commits += 1
+        return done, offset, commits
+
+    def commit(self, files, offset=None, part=None):
+        entry = {"files": list(files), "offset": offset}
+        if part is not None:
+            entry["part"] = part
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def reset(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class TextOutput:
+    """✅ JSONL/CSV 파일 — 보고서 하나마다 기록 → fsync → 저널 커밋 (메모리에 쌓지 않음)"""
+
+    def __init__(self, path, fmt, resume=False):
+        self.journal = CommitJournal(path + ".journal")
+        self.done, offset, _ = self.journal.load() if resume else (set(), 0, 0)
+        size = os.path.getsize(path) if os.path.exists(path) else -1
+        if resume and self.done and size < offset:
+            # 출력이 없거나 커밋 시점보다 짧음 → 커밋된 결과를 잃었으므로 건너뛰지 않고 처음부터
+            print(f"⚠️ {path}에 커밋된 결과가 없어 저널을 초기화하고 처음부터 처리합니다.", file=sys.stderr)
+            resume = False
+            self.done, offset = set(), 0
+        if not resume:
+            self.journal.reset()
+        if resume and size >= 0:
+            os.truncate(path, offset)
+        else:
+            offset = 0
+        # ✅ 엑셀 호환을 위해 CSV는 utf-8-sig (B.py 다운로드와 동일, 이어 쓸 때는 BOM 없음)
+        encoding = "utf-8-sig" if fmt == "csv" else "utf-8"
+        self._f = open(path, "a" if offset else "w", encoding=encoding, newline="")
+        self._writer = WRITERS[fmt](self._f, header=not offset)
+
+    def write(self, record):
+        self._writer.write(record)
+        os.fsync(self._f.fileno())
+        self.journal.commit([record["file"]], os.fstat(self._f.fileno()).st_size)
+
+    def close(self):
+        self._f.close()
+
+
+class ParquetOutput:
+    """
+    ✅ Parquet 폴더 — 보고서 batch_size개마다 part 파일 하나(행 그룹 하나)를 원자적으로 추가
+       <폴더>/보고서/part-*.parquet : 파일별 상태 + 결과 JSON (모든 검사)
+       <폴더>/지표/part-*.parquet, <폴더>/소검사/part-*.parquet : 지능검사 열 형식 점수 (S.py)
+       Parquet 파일은 끝(footer)까지 써야 읽을 수 있으므로 이어 쓰기 대신 part 단위로 커밋
+    """
+
+    TABLES = ("보고서", "지표", "소검사")
+    # 보고서 표 열 타입 — part마다 고정 스키마로 저장 (실패만 있는 part도 instrument가 null 타입이 되지 않도록)
+    REPORT_COLUMNS = {
+        "file": "string", "instrument": "string", "confidence": "float64",
+        "status": "string", "error": "string", "seconds": "float64", "result": "string",
+    }
+
+    def __init__(self, folder, resume=False, batch_size=256):
+        self.folder = folder
+        self.batch_size = batch_size
+        self.journal = CommitJournal(os.path.join(folder, "_journal"))
+        os.makedirs(folder, exist_ok=True)
+        if not resume:
+            self.journal.reset()
+            for table in self.TABLES:
+                shutil.rmtree(os.path.join(folder, table), ignore_errors=True)
+        # ✅ 저널 항목마다 part 번호 기록 — 세 표의 part 파일이 모두 남아 있는 커밋만 완료로 봄
+        #    (part 파일이 지워졌으면 그 파일들은 다시 처리), 커밋되지 않은 part(중단 시점에 쓰던 것)는 삭제
+        for table in self.TABLES:
+            os.makedirs(os.path.join(folder, table), exist_ok=True)
+        self.journal.repair()
+        self.done, committed, self._part = set(), set(), 0
+        for i, entry in enumerate(self.journal.entries()):
+            name = self._part_name(entry.get("part", i))
+            self._part = max(self._part, entry.get("part", i) + 1)
+            if all(os.path.exists(os.path.join(folder, table, name)) for table in self.TABLES):
+                self.done.update(entry["files"])
+                committed.add(name)
+            else:
+                print(f"⚠️ {name}이(가) 없어 해당 보고서 {len(entry['files'])}개를 다시 처리합니다.", file=sys.stderr)
+        for table in self.TABLES:
+            for name in os.listdir(os.path.join(folder, table)):
+                if name not in committed:
+                    os.remove(os.path.join(folder, table, name))
+        self._buffer = []
+
+    @staticmethod
+    def _part_name(index):
+        return f"part-{index:06d}.parquet"
+
+    def write(self, record):
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        import pandas as pd
+        import S
+        from R import IQResult
+
+        records, self._buffer = self._buffer, []
+        reports = pd.DataFrame({
+            **{k: [r[k] for r in records] for k in RECORD_FIELDS},
+            "result": [json.dumps(r["result"], ensure_ascii=False) for r in records],
+        })
+        iq = [
+            (r["file"], IQResult.from_dict(r["result"]))
+            for r in records if r["status"] == "ok" and r["instrument"] in ("WPPSI", "WISC", "WAIS")
+        ]
+        name = self._part_name(self._part)
+        for table, frame, columns in (
+            ("보고서", reports, self.REPORT_COLUMNS),
+            ("지표", S.index_frame(iq), S.INDEX_COLUMNS),
+            ("소검사", S.subtest_frame(iq), S.SUBTEST_COLUMNS),
+        ):
+            path = os.path.join(self.folder, table, name)
+            S.write_parquet(frame, path + ".tmp", S.arrow_schema(columns))
+            os.replace(path + ".tmp", path)
+        self.journal.commit([r["file"] for r in records], part=self._part)
+        self._part += 1
+
+    def close(self):
+        self.flush()
+
+
+def open_output(path, fmt, resume=False):
+    if fmt == "parquet":
+        return ParquetOutput(path, resume)
+    return TextOutput(path, fmt, resume)
+
+
+def run_batch(paths, writer, workers=None):
+    """
+    ✅ 코어 수만큼 프로세스 풀로 추출, 끝나는 순서대로 writer에 기록
+       동시에 제출하는 파일 수를 제한해 파일이 아무리 많아도 메모리가 일정
+    """
+    paths = list(paths)
+    workers = workers or available_cores()
+    done = failed = 0
+    pending = set()
+    remaining = iter(paths)
+    # 워커 안에서는 OCR도 인라인 실행 (Tesseract 프로세스 수 ≤ 워커 수)
+    with ProcessPoolExecutor(max_workers=workers, initializer=M.run_inline) as pool:
+        while True:
+            for path in remaining:
+                pending.add(pool.submit(Q.call_with_metrics, process_file, path))
+                if len(pending) >= workers * 2:
+                    break
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                record, worker_metrics = future.result()
+                Q.metrics.merge(worker_metrics)
+                writer.write(record)
+                done += 1
+                if record["status"] != "ok":
+                    failed += 1
+                print(f"[{done}/{len(paths)}] {record['status']} {record['file']}", file=sys.stderr)
+    return done, failed
+
+
+def run_queue(args, paths, fmt):
+    """✅ --queue: 워커가 큐에서 직접 가져가 처리 → 끝난 뒤 큐의 결과 전체를 출력으로 내보냄"""
+    import T
+
+    counts = T.run_queue(args.queue, paths, process_file, args.workers or available_cores(),
+                         max_attempts=args.max_attempts, timeout=args.timeout, initializer=M.run_inline)
+    if args.output == "-":
+        writer, out = WRITERS[fmt](sys.stdout), None
+    else:
+        writer = out = open_output(args.output, fmt)
+    queue = T.JobQueue(args.queue)
+    try:
+        for record in queue.records():
+            writer.write(record)
+    finally:
+        queue.close()
+        if out is not None:
+            out.close()
+    print(f"작업 큐: {json.dumps(counts, ensure_ascii=False)}", file=sys.stderr)
+    return counts["done"] + counts["failed"], counts["failed"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="K-WPPSI/K-WISC/K-WAIS/TCI/PAT PDF 폴더 일괄 점수 추출")
+    parser.add_argument("folder", help="PDF가 들어있는 폴더")
+    parser.add_argument("-o", "--output", default="-", help="결과 파일, parquet은 폴더 (기본: 표준출력)")
+    parser.add_argument("--format", choices=sorted(WRITERS) + ["parquet"], default=None,
+                        help="출력 형식 (기본: 출력 파일 확장자, 없으면 jsonl)")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: 사용 가능한 코어 수)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="하위 폴더까지 검색")
+    parser.add_argument("--resume", action="store_true",
+                        help="중단된 실행 이어서 — 이미 기록된 파일은 건너뛰고 출력에 이어 씀")
+    parser.add_argument("--queue", default=None,
+                        help="SQLite 작업 큐 파일 — 파일별 상태/해시/시간/오류 기록, 다시 실행하면 남은 파일만 처리")
+    parser.add_argument("--max-attempts", type=int, default=3, help="--queue: 파일당 최대 시도 횟수")
+    parser.add_argument("--timeout", type=float, default=None, help="--queue: 파일 하나의 최대 처리 시간(초)")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="페이지마다 추출 직후 레이아웃/파서 캐시 해제 (PDF_LOW_MEMORY=1과 같음)")
+    parser.add_argument("--metrics", default=None, help="단계별 지표를 Prometheus 텍스트 형식으로 저장할 파일")
+    args = parser.parse_args(argv)
+
+    output = args.output.lower()
+    fmt = args.format or ("csv" if output.endswith(".csv") else "parquet" if output.endswith(".parquet") else "jsonl")
+    if args.output == "-" and (fmt == "parquet" or args.resume):
+        parser.error("parquet 출력과 --resume에는 -o 경로가 필요합니다.")
+    if args.queue and args.resume:
+        parser.error("--queue는 큐 자체가 진행 상태를 기록하므로 --resume과 함께 쓰지 않습니다.")
+    if args.low_memory:
+        # 워커 프로세스가 fork/spawn 어느 쪽이든 같은 설정을 받도록 환경변수와 모듈 값 모두 설정
+        os.environ["PDF_LOW_MEMORY"] = "1"
+        H.LOW_MEMORY = True
+    paths = find_pdfs(args.folder, args.recursive)
+
+    started = time.perf_counter()
+    if args.queue:
+        done, failed = run_queue(args, paths, fmt)
+    elif args.output == "-":
+        done, failed = run_batch(paths, WRITERS[fmt](sys.stdout), args.workers)
+    else:
+        out = open_output(args.output, fmt, args.resume)
+        if out.done:
+            print(f"↻ 이미 기록된 {len(out.done)}개 파일은 건너뜁니다.", file=sys.stderr)
+        try:
+            done, failed = run_batch((p for p in paths if p not in out.done), out, args.workers)
+        finally:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    if args.metrics:
+        Q.write_prometheus(args.metrics)
+    print(f"✅ {done}개 처리 (실패 {failed}개), {elapsed:.1f}초", file=sys.stderr)
+    rss = Q.peak_rss_by_process()
+    print("최대 RSS(MB): " + ", ".join(
+        f"{'본 프로세스' if pid == os.getpid() else pid} {value / (1024 * 1024):.0f}" for pid, value in sorted(rss.items())
+    ), file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import os
+import re
+from dataclasses import dataclass
+
+from H import PDFDocument, document
+from Q import timed
+
+# -------------------------------
+# ✅ 내용 기반 검사 종류 판별
+#    첫 페이지 텍스트 + PDF 메타데이터만 읽음 (전체 파싱 전에 대량으로 돌릴 수 있음)
+# -------------------------------
+# (패턴, 가중치) — 검사 약칭은 강한 신호, 한글 검사명/척도명은 보조 신호
+INSTRUMENT_SIGNALS = {
+    "WPPSI": [(r"WPPSI", 4), (r"유아\s*지능", 2), (r"유아용", 2)],
+    "WISC": [(r"WISC", 4), (r"아동\s*지능", 2), (r"아동용", 2)],
+    "WAIS": [(r"WAIS", 4), (r"성인\s*지능", 2), (r"성인용", 2)],
+    "TCI": [(r"(?<![A-Z])TCI(?![A-Z])", 4), (r"기질\s*및\s*성격", 3), (r"자극추구", 1), (r"위험회피", 1), (r"연대감", 1)],
+    "PAT": [(r"(?<![A-Z])PAT(?![A-Z])", 4), (r"양육\s*태도", 3), (r"지지표현", 1), (r"합리적\s*설명", 1), (r"비일관성", 1)],
+}
+INSTRUMENT_SIGNALS = {
+    inst: [(re.compile(p, re.IGNORECASE), w) for p, w in signals]
+    for inst, signals in INSTRUMENT_SIGNALS.items()
+}
+
+# ✅ K-WPPSI 연령 구분 (G.py 지표/소검사 배치가 다름)
+WPPSI_VARIANTS = [
+    ("4세이상", re.compile(r"4\s*세\s*이상|4:0\s*[-~]\s*7:7")),
+    ("4세미만", re.compile(r"4\s*세\s*미만|2:6\s*[-~]\s*3:11")),
+]
+
+# 강한 신호 하나(4)와 보조 신호 하나 이상이면 신뢰도 1.0
+FULL_CONFIDENCE_SCORE = 6
+
+
+@dataclass(frozen=True)
+class Classification:
+    instrument: str = None
+    variant: str = None
+    confidence: float = 0.0
+
+
+def _score(text, weight=1):
+    scores = {}
+    for inst, signals in INSTRUMENT_SIGNALS.items():
+        s = sum(w for pattern, w in signals if pattern.search(text))
+        if s:
+            scores[inst] = s * weight
+    return scores
+
+
+def _wppsi_variant(*texts):
+    for text in texts:
+        for variant, pattern in WPPSI_VARIANTS:
+            if pattern.search(text):
+                return variant
+    return None
+
+
+@timed("classify")
+def classify_document(doc):
+    """
+    ✅ 이미 열린 PDFDocument 판별 — 1페이지 텍스트와 메타데이터, 파일명(약한 힌트)만 사용
+       신뢰도 = 점수 포화도 × (1위 점수 / 전체 점수)
+    """
+    # 로드 계획에 1페이지가 없는 문서(다른 검사용으로 연 문서)는 메타데이터/파일명만으로 판별
+    first_page = doc.page_text(0) if doc.page_count and (doc.pages is None or 0 in doc.pages) else ""
+    meta = " ".join(doc.metadata.values())
+
+    scores = {}
+    # 메타데이터 제목/주제는 본문보다 더 믿을 만함, 파일명은 동점 처리용
+    for text, weight in ((first_page, 1), (meta, 2), (doc.name, 0.5)):
+        for inst, s in _score(text, weight).items():
+            scores[inst] = scores.get(inst, 0) + s
+
+    if not scores:
+        return Classification()
+
+    instrument = max(scores, key=scores.get)
+    best = scores[instrument]
+    confidence = min(1.0, best / FULL_CONFIDENCE_SCORE) * best / sum(scores.values())
+    variant = _wppsi_variant(first_page, meta, doc.name) if instrument == "WPPSI" else None
+    return Classification(instrument, variant, round(confidence, 3))
+
+
+def classify(source, name=None):
+    """✅ 경로/바이트/업로드/PDFDocument 판별 — 새로 열 때는 1페이지만 로드"""
+    if isinstance(source, PDFDocument):
+        return classify_document(source)
+    if name is None and isinstance(source, (str, os.PathLike)):
+        name = os.path.basename(source)
+    with PDFDocument(source, name=name, pages=[0]) as doc:
+        return classify_document(doc)
+
+
+def wppsi_variant(pdf_source):
+    """✅ K-WPPSI 4세 이상/미만 — 판별이 안 되면 기존 기본값(4세 미만)"""
+    with document(pdf_source, "WPPSI") as doc:
+        return _wppsi_variant(doc.page_text(0), " ".join(doc.metadata.values()), doc.name) or "4세미만"
@@ -0,0 +1,241 @@
+import io
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httplib2
+import streamlit as st
+from googleapiclient.discovery import build
+from googleapiclient.http import MediaIoBaseDownload
+from oauth2client.service_account import ServiceAccountCredentials
+
+import Q
+
+# -------------------------------
+# ✅ 참조 데이터 서브시스템 (기질 해석 / PAT 설명 JSON)
+#    - Drive 인증/클라이언트는 여기 하나만 두고 C/D는 load(name)만 호출
+#    - import 시점에는 아무것도 내려받지 않고, 처음 쓸 때 로드
+#    - prefetch()로 UI가 그려지는 동안 백그라운드에서 여러 파일을 동시에 받아둘 수 있음
+# -------------------------------
+# 이름: (Google Drive 파일 ID, 최상위 JSON 타입)
+REFERENCE_FILES = {
+    "temperament": ("1TZzYppfIZB7GowdBiTf5dDYEV6_7AXbj", dict),
+    "pat_explain": ("1n17KiyaQ5cp_xFjgzFtmrE2Hvoqh5aXC", dict),  # 판단별_설명.json
+}
+
+_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="reference-data")
+
+# -------------------------------
+# ✅ 공용 Google Drive 클라이언트
+# -------------------------------
+def load_google_service_account_key():
+    return st.secrets["gcp"]
+
+@st.cache_resource(ttl=3000, show_spinner=False)
+def get_drive_credentials():
+    scope = ['https://www.googleapis.com/auth/drive']
+    return ServiceAccountCredentials.from_json_keyfile_dict(load_google_service_account_key(), scope)
+
+@st.cache_resource(ttl=3000, show_spinner=False)
+def get_drive_service():
+    # googleapiclient 2.x는 내장 discovery 문서를 쓰므로 네트워크 조회 없이 한 번만 생성
+    return build('drive', 'v3', credentials=get_drive_credentials(), cache_discovery=False)
+
+_thread_local = threading.local()
+
+def _drive_http():
+    """✅ httplib2.Http는 스레드 간 공유가 안전하지 않으므로 스레드별 인증 연결을 재사용"""
+    if getattr(_thread_local, "http", None) is None:
+        _thread_local.http = get_drive_credentials().authorize(httplib2.Http())
+    return _thread_local.http
+
+# -------------------------------
+# ✅ 참조 데이터 원본 (Drive / 로컬 파일)
+# -------------------------------
+class DriveSource:
+    """✅ Google Drive 파일 — 버전 확인은 메타데이터 조회 한 번, 바뀐 경우에만 전체 다운로드"""
+
+    def __init__(self, file_id):
+        self.file_id = file_id
+
+    def fetch_version(self):
+        meta = get_drive_service().files().get(
+            fileId=self.file_id, fields="version,modifiedTime"
+        ).execute(http=_drive_http())
+        return f"{meta.get('version', '')}@{meta.get('modifiedTime', '')}"
+
+    def download(self):
+        request = get_drive_service().files().get_media(fileId=self.file_id)
+        request.http = _drive_http()
+        fh = io.BytesIO()
+        downloader = MediaIoBaseDownload(fh, request)
+        done = False
+        while not done:
+            status, done = downloader.next_chunk()
+        return fh.getvalue()
+
+
+class LocalFileSource:
+    """✅ Drive 대체용 로컬 파일 (테스트 / 외부망 차단 배포)"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def fetch_version(self):
+        st_ = os.stat(self.path)
+        return f"{st_.st_size}@{st_.st_mtime_ns}"
+
+    def download(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+# -------------------------------
+# ✅ 로컬 스냅샷 저장소 (버전별 보관 + 현재 버전 포인터)
+#    <root>/<name>/<저장시각>.json, <root>/<name>/current.json
+# -------------------------------
+class SnapshotStore:
+    def __init__(self, root, keep=5):
+        self.root = root
+        self.keep = keep
+
+    def _dir(self, name):
+        return os.path.join(self.root, name)
+
+    def current(self, name):
+        try:
+            with open(os.path.join(self._dir(name), "current.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def read(self, name, meta):
+        with open(os.path.join(self._dir(name), meta["file"]), "rb") as f:
+            return f.read()
+
+    def write(self, name, version, data):
+        folder = self._dir(name)
+        os.makedirs(folder, exist_ok=True)
+        filename = f"{time.strftime('%Y%m%dT%H%M%S')}_{time.time_ns() % 1_000_000_000:09d}.json"
+        _atomic_write(os.path.join(folder, filename), data)
+        meta = {"version": version, "file": filename, "checked_at": time.time()}
+        self.set_current(name, meta)
+        self._prune(name)
+        return meta
+
+    def set_current(self, name, meta):
+        data = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+        _atomic_write(os.path.join(self._dir(name), "current.json"), data)
+
+    def _prune(self, name):
+        folder = self._dir(name)
+        snapshots = sorted(f for f in os.listdir(folder) if f != "current.json" and f.endswith(".json"))
+        for old in snapshots[:-self.keep]:
+            os.remove(os.path.join(folder, old))
+
+
+def _atomic_write(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+# -------------------------------
+# ✅ 참조 데이터 로더 — 로컬 스냅샷 우선, 원본 버전이 바뀐 경우에만 갱신
+# -------------------------------
+class ReferenceData:
+    """
+    ✅ load(name)
+       - check_interval 안에는 원본을 확인하지 않고 로컬 스냅샷만 읽음 (앱 재시작 후에도 유지)
+       - 간격이 지나면 원본 버전(version/modifiedTime)만 조회, 바뀐 경우에만 내려받음
+       - 원본 조회/다운로드가 실패하면 마지막 스냅샷으로 계속 서비스
+    """
+
+    def __init__(self, store, check_interval=3000):
+        self.store = store
+        self.check_interval = check_interval
+        self._sources = {}
+        self._kinds = {}
+        self._parsed = {}
+        self._locks = {}
+
+    def add(self, name, source, kind=dict):
+        self._sources[name] = source
+        self._kinds[name] = kind
+        self._locks[name] = threading.Lock()
+
+    def load(self, name):
+        with self._locks[name]:
+            meta = self._refresh(name, self.store.current(name))
+            cached = self._parsed.get(name)
+            if cached is not None and cached[0] == meta["file"]:
+                return cached[1]
+            value = json.loads(self.store.read(name, meta))
+            self._parsed[name] = (meta["file"], value)
+            return value
+
+    def _refresh(self, name, meta):
+        if meta is not None and time.time() - meta.get("checked_at", 0) < self.check_interval:
+            return meta
+
+        source = self._sources[name]
+        try:
+            with Q.stage("reference_check", reference=name):
+                version = source.fetch_version()
+            if meta is None or meta["version"] != version:
+                with Q.stage("reference_download", reference=name):
+                    data = source.download()
+                Q.inc("reference_bytes_total", len(data), reference=name)
+                # ✅ 깨진 JSON이나 형태가 다른 파일은 스냅샷으로 저장하지 않음
+                value = json.loads(data)
+                if not isinstance(value, self._kinds[name]):
+                    raise TypeError(f"참조 데이터 '{name}' 형식 오류: {type(value).__name__}")
+                return self.store.write(name, version, data)
+        except Exception:
+            if meta is None:
+                raise
+            logging.getLogger(__name__).warning("참조 데이터 '%s' 원본 확인 실패 — 로컬 스냅샷 사용", name, exc_info=True)
+
+        meta = {**meta, "checked_at": time.time()}
+        self.store.set_current(name, meta)
+        return meta
+
+
+reference_data = ReferenceData(
+    SnapshotStore(os.environ.get("REFERENCE_DATA_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "reference_data")),
+    check_interval=float(os.environ.get("REFERENCE_CHECK_SECONDS", "3000")),
+)
+
+
+def reference_source(name, file_id):
+    """✅ REFERENCE_SOURCE_DIR가 있으면 Drive 대신 <폴더>/<name>.json 사용"""
+    local_dir = os.environ.get("REFERENCE_SOURCE_DIR")
+    if local_dir:
+        return LocalFileSource(os.path.join(local_dir, f"{name}.json"))
+    return DriveSource(file_id)
+
+
+for _name, (_file_id, _kind) in REFERENCE_FILES.items():
+    reference_data.add(_name, reference_source(_name, _file_id), _kind)
+
+# -------------------------------
+# ✅ 공개 API
+# -------------------------------
+def load(name):
+    """✅ 참조 데이터 하나 (REFERENCE_FILES에 선언된 타입, 보통 dict)"""
+    return reference_data.load(name)
+
+
+def load_many(*names):
+    """✅ 여러 파일을 동시에 로드 — {이름: 데이터}"""
+    names = names or tuple(REFERENCE_FILES)
+    return dict(zip(names, _pool.map(reference_data.load, names)))
+
+
+def prefetch(*names):
+    """✅ 백그라운드 로드 시작 — 이후 load()는 같은 이름의 잠금에서 기다렸다가 결과를 받음
+    이름마다 load를 바로 제출 (풀 안에서 같은 풀의 결과를 기다리면 작업자가 모두 막힘) — {이름: Future}"""
+    names = names or tuple(REFERENCE_FILES)
+    return {name: _pool.submit(reference_data.load, name) for name in names}
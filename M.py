@@ -0,0 +1,122 @@
+import io
+import multiprocessing
+import os
+import shutil
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+try:
+    import pytesseract
+    from PIL import Image
+except ImportError:  # OCR 미설치 환경에서는 텍스트 레이어만 사용
+    pytesseract = None
+
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+
+# -------------------------------
+# ✅ 스캔본 OCR (Tesseract)
+#    텍스트 레이어가 없는 페이지만, 이미지가 있는 영역만, 원본 해상도를 넘지 않는 DPI로 래스터화해
+#    제한된 프로세스 풀에서 인식 → 결과 단어 좌표를 PDF 좌표로 되돌려 기존 파서에 그대로 넘김
+# -------------------------------
+OCR_LANG = os.environ.get("OCR_LANG", "kor+eng")
+OCR_MAX_DPI = int(os.environ.get("OCR_MAX_DPI", "300"))
+OCR_MIN_DPI = 150  # 이보다 낮으면 한글 인식률이 크게 떨어짐
+OCR_TIMEOUT = float(os.environ.get("OCR_TIMEOUT", "120"))
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+MIN_TEXT_CHARS = 20  # 공백 제외 글자 수가 이보다 적으면 텍스트 레이어가 없는 것으로 봄
+
+
+def available():
+    return (
+        pytesseract is not None
+        and pymupdf is not None
+        and shutil.which(pytesseract.pytesseract.tesseract_cmd) is not None
+    )
+
+
+def needs_ocr(text):
+    return len("".join(text.split())) < MIN_TEXT_CHARS
+
+
+def render_region(page):
+    """
+    ✅ 페이지에서 스캔 이미지가 놓인 영역만 회색조 PNG로 렌더링
+       DPI = 원본 이미지 해상도 (OCR_MIN_DPI ~ OCR_MAX_DPI 범위로 제한)
+       반환: (PNG 바이트, 포인트→픽셀 배율, 영역 왼쪽 위 좌표)
+    """
+    clip = pymupdf.Rect()
+    native_dpi = 0
+    for info in page.get_image_info():
+        bbox = pymupdf.Rect(info["bbox"]) & page.rect
+        if bbox.is_empty:
+            continue
+        clip |= bbox
+        native_dpi = max(native_dpi, info["width"] / bbox.width * 72)
+    if clip.is_empty:
+        clip = page.rect
+        native_dpi = OCR_MAX_DPI
+
+    dpi = int(min(OCR_MAX_DPI, max(OCR_MIN_DPI, native_dpi)))
+    pix = page.get_pixmap(dpi=dpi, clip=clip, colorspace=pymupdf.csGRAY)
+    return pix.tobytes("png"), dpi / 72, (clip.x0, clip.y0)
+
+
+def _recognize(png, scale, origin, lang):
+    """✅ 워커 프로세스에서 실행 — 단어 목록(H.page_words와 같은 형태, PDF 좌표) 반환"""
+    data = pytesseract.image_to_data(
+        Image.open(io.BytesIO(png)), lang=lang, output_type=pytesseract.Output.DICT
+    )
+    ox, oy = origin
+    words = []
+    for text, left, top, width, height in zip(
+        data["text"], data["left"], data["top"], data["width"], data["height"]
+    ):
+        if text.strip():
+            words.append({
+                "text": text.strip(),
+                "x0": left / scale + ox,
+                "top": top / scale + oy,
+                "x1": (left + width) / scale + ox,
+                "bottom": (top + height) / scale + oy,
+            })
+    return words
+
+
+_pool = None
+_pool_lock = threading.Lock()
+# ✅ 일괄 처리 워커(J.py/T.py)나 Streamlit 파싱 풀(N.py)처럼 이미 프로세스 풀 안에서 도는 곳에서는
+#    OCR 풀을 따로 만들지 않고 워커 안에서 바로 인식 — 워커마다 OCR_WORKERS개씩 Tesseract 프로세스가 늘어나지 않도록
+_inline = False
+
+
+def run_inline():
+    """✅ 프로세스 풀 initializer — 이 프로세스에서는 OCR을 같은 프로세스에서 실행"""
+    global _inline
+    _inline = True
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Streamlit 서버처럼 스레드가 있는 프로세스에서 fork하지 않도록 spawn 사용
+            _pool = ProcessPoolExecutor(
+                max_workers=OCR_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def submit(page):
+    """✅ 렌더링은 호출 프로세스(C 엔진, 빠름), 인식은 OCR 풀에서 — Future[단어 목록] 반환"""
+    png, scale, origin = render_region(page)
+    if _inline:
+        future = Future()
+        try:
+            future.set_result(_recognize(png, scale, origin, OCR_LANG))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    return _get_pool().submit(_recognize, png, scale, origin, OCR_LANG)
@@ -0,0 +1,333 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+import streamlit as st
+
+from B import _extract_scores, format_index_scores_excel, format_subtest_scores_excel
+from C import (
+    extract_tci_percentiles, extract_tci_m_sd, get_temperament_dict, hml_scales,
+    interpretation_table, SUMMARY_PARTS, TEMPERAMENT_PARTS,
+)
+from D import extract_pat_percentiles_from_bytes, explain_results
+from H import content_digest, document
+from I import cache_key, result_cache
+from K import classify
+import L
+import M
+import Q
+
+# -------------------------------
+# ✅ Streamlit 백그라운드 추출 작업
+#    - 단계 진행은 서버 공용 스레드 풀, PDF 파싱은 공용 프로세스 풀에서 실행
+#      (한 세션의 큰 PDF가 서버 프로세스의 GIL을 잡아 다른 세션 화면까지 멈추지 않도록)
+#    - 작업은 세션 상태에 고정 → 위젯 조작으로 재실행돼도 다시 파싱하지 않음
+# -------------------------------
+EXTRACT_THREADS = int(os.environ.get("EXTRACT_THREADS", "8"))
+EXTRACT_PROCESSES = int(os.environ.get("EXTRACT_PROCESSES", "0")) or min(4, os.cpu_count() or 1)
+
+
+@st.cache_resource(show_spinner=False)
+def get_stage_executor():
+    return ThreadPoolExecutor(max_workers=EXTRACT_THREADS, thread_name_prefix="extract")
+
+
+@st.cache_resource(show_spinner=False)
+def get_parse_pool():
+    # 파싱 워커 안에서는 OCR도 인라인 실행 → Tesseract 프로세스 수 ≤ EXTRACT_PROCESSES
+    return ProcessPoolExecutor(
+        max_workers=EXTRACT_PROCESSES, mp_context=multiprocessing.get_context("spawn"),
+        initializer=M.run_inline,
+    )
+
+
+class ExtractionJob:
+    """✅ 단계별 진행 상황을 가진 추출 작업 (스레드에서 갱신, 화면에서 읽기만 함)"""
+
+    def __init__(self, stages):
+        self.stages = stages
+        self.stage = None
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self._future = None
+        self._lock = threading.Lock()
+
+    def advance(self, stage):
+        with self._lock:
+            self.stage = stage
+
+    @property
+    def progress(self):
+        if self.done:
+            return 1.0
+        if self.stage is None:
+            return 0.0
+        return self.stages.index(self.stage) / len(self.stages)
+
+    @property
+    def done(self):
+        return self._future is not None and self._future.done()
+
+    @property
+    def failed(self):
+        return self.done and self._future.exception() is not None
+
+    def result(self, timeout=None):
+        return self._future.result(timeout)
+
+    def _run(self, pipeline, *args):
+        try:
+            return pipeline(self, *args)
+        finally:
+            self.elapsed = time.perf_counter() - self.started
+
+
+def submit(pipeline, stages, *args):
+    job = ExtractionJob(stages)
+    job._future = get_stage_executor().submit(job._run, pipeline, *args)
+    return job
+
+
+def _submit_parse(kind, func, data, *args):
+    """
+    ✅ 결과 캐시 적중이면 완료된 Future, 아니면 파싱 프로세스 풀에 제출하고 끝나면 캐시에 저장
+       (작업 스레드가 같은 스레드 풀에 하위 작업을 넣고 기다리지 않도록 Future를 바로 반환)
+    """
+    key = cache_key(kind, data, *args)
+    found, value = result_cache.get(key)
+    Q.inc("result_cache_total", kind=kind, result="hit" if found else "miss")
+    future = Future()
+    if found:
+        future.set_result(value)
+        return future
+
+    def store(done):
+        # ✅ 워커 프로세스에서 쌓인 단계별 지표를 서버 프로세스 지표에 합침
+        if done.exception() is not None:
+            future.set_exception(done.exception())
+            return
+        value, worker_metrics = done.result()
+        Q.metrics.merge(worker_metrics)
+        result_cache.put(key, value)
+        future.set_result(value)
+
+    get_parse_pool().submit(Q.call_with_metrics, func, data, *args).add_done_callback(store)
+    return future
+
+# -------------------------------
+# ✅ 검사별 파이프라인 (단계: 열기 → 페이지 파싱 → 매칭 → 정리)
+#    파싱 제출(submit_*)과 해석/정리(finish_*)를 나눠 단일 업로드와 통합 분석이 같이 씀
+# -------------------------------
+IQ_STAGES = ["열기", "페이지 파싱", "정리"]
+TCI_STAGES = ["열기", "페이지 파싱", "매칭", "정리"]
+PAT_STAGES = ["열기", "페이지 파싱", "매칭", "정리"]
+PROFILE_STAGES = ["열기", "페이지 파싱", "매칭", "정리"]
+
+
+def submit_iq(data, name, instrument=None):
+    """✅ instrument: 이미 판별한 검사 종류 (워커에서 다시 판별하지 않음)"""
+    if instrument is None:
+        return _submit_parse("IQ", _extract_scores, data, name)
+    return _submit_parse("IQ", _extract_scores, data, name, instrument)
+
+
+def finish_iq(parsed):
+    scores, _ = parsed
+    is_wais = scores.instrument == "WAIS"
+    return {
+        "점수": scores,
+        "지표표": format_index_scores_excel(scores.index, is_wais=is_wais) if scores.index else None,
+        "소검사표": format_subtest_scores_excel(scores.subtests) if scores.subtests else None,
+    }
+
+
+def _parse_tci_pages(data):
+    """✅ 파싱 프로세스에서 실행 — 한 번 열어 백분위/M(SD) 함께 추출"""
+    with document(data, "TCI") as doc:
+        return extract_tci_percentiles(doc), extract_tci_m_sd(doc)
+
+
+def submit_tci(data, name=None, instrument=None):
+    return _submit_parse("TCI", _parse_tci_pages, data)
+
+
+def match_tci(hml_values, m_sd, data):
+    """✅ 기질/요약 매칭 — [(섹션, 검색 키, 매칭 상태, 설명)] 두 묶음 (전체 조합 해석 표 조회)"""
+    found = interpretation_table(data).lookup(hml_values, m_sd)
+    sections = []
+    for parts in (TEMPERAMENT_PARTS, SUMMARY_PARTS):
+        rows = [(part, *found[part]) for part in parts]
+        sections.append(({part: key for part, key, _, _ in rows}, rows))
+    return sections
+
+
+def finish_tci(parsed, temperament):
+    percentiles, m_sd = parsed
+    hml_values = {s: percentiles.get(s, {}).get("level", "M") for s in hml_scales}
+    with Q.stage("match", instrument="TCI"):
+        sections = match_tci(hml_values, m_sd, temperament)
+    return {"H/M/L": hml_values, "기질": sections[0], "요약": sections[1]}
+
+
+def submit_pat(data, name=None, instrument=None):
+    return _submit_parse("PAT", extract_pat_percentiles_from_bytes, data)
+
+
+def finish_pat(parsed):
+    with Q.stage("match", instrument="PAT"):
+        explained = explain_results(parsed["결과"]) if parsed["결과"] else None
+    return {"백분위": parsed["백분위"], "결과": parsed["결과"], "설명": explained}
+
+
+def run_iq(job, data, name):
+    job.advance("열기")
+    found = classify(data, name=name)
+
+    job.advance("페이지 파싱")
+    parsed = submit_iq(data, name, found.instrument).result()
+
+    job.advance("정리")
+    return {"분류": found, **finish_iq(parsed)}
+
+
+def run_tci(job, data, name):
+    job.advance("열기")
+    # 참조 사전은 파싱과 겹쳐서 미리 로드
+    L.prefetch("temperament")
+
+    job.advance("페이지 파싱")
+    parsed = submit_tci(data).result()
+
+    job.advance("매칭")
+    result = finish_tci(parsed, get_temperament_dict())
+
+    job.advance("정리")
+    return result
+
+
+def run_pat(job, data, name):
+    job.advance("열기")
+    job.advance("페이지 파싱")
+    parsed = submit_pat(data).result()
+
+    job.advance("매칭")
+    result = finish_pat(parsed)
+
+    job.advance("정리")
+    return result
+
+# -------------------------------
+# ✅ 한 내담자의 여러 보고서 통합 분석
+#    파일별 검사 판별 → 모든 파싱 동시 실행 → 참조 데이터는 한 번만 로드 → 하나의 프로필
+# -------------------------------
+REFERENCE_NAMES = ("temperament", "pat_explain")
+# 검사 종류 → (프로필 항목, 파싱 제출 함수)
+PROFILE_SECTIONS = {
+    "WPPSI": ("지능검사", submit_iq),
+    "WISC": ("지능검사", submit_iq),
+    "WAIS": ("지능검사", submit_iq),
+    "TCI": ("TCI", submit_tci),
+    "PAT": ("PAT", submit_pat),
+}
+
+
+def run_profile(job, files):
+    """
+    ✅ files: [(바이트, 파일명)]
+       반환: {"파일": [{파일, 검사, 신뢰도, 항목}], "지능검사"/"TCI"/"PAT": 결과, "경고": [...]}
+       같은 항목에 파일이 둘 이상이면 판별 신뢰도가 높은 파일을 쓰고 경고에 남김
+    """
+    job.advance("열기")
+    L.prefetch(*REFERENCE_NAMES)
+    profile = {"파일": [], "경고": []}
+    # 1페이지만 읽는 판별이라 순서대로 해도 파싱에 비해 무시할 만함
+    found = []
+    for data, name in files:
+        try:
+            found.append(classify(data, name=name))
+        except Exception as e:  # ✅ 손상된 파일 하나가 통합 분석 전체를 멈추지 않도록 경고로 남김
+            profile["경고"].append(f"{name}: 판별 실패 ({type(e).__name__}: {e})")
+            found.append(None)
+
+    chosen = {}
+    for (data, name), c in zip(files, found):
+        if c is None:
+            profile["파일"].append({"파일": name, "검사": None, "신뢰도": 0.0, "항목": None})
+            continue
+        section = PROFILE_SECTIONS.get(c.instrument, (None, None))[0]
+        profile["파일"].append({"파일": name, "검사": c.instrument, "신뢰도": c.confidence, "항목": section})
+        if section is None:
+            profile["경고"].append(f"{name}: 검사 종류를 판별할 수 없습니다.")
+        elif section in chosen and chosen[section][2].confidence >= c.confidence:
+            profile["경고"].append(f"{name}: {section} 보고서가 이미 있어 제외했습니다.")
+        else:
+            if section in chosen:
+                profile["경고"].append(f"{chosen[section][1]}: {section} 보고서가 이미 있어 제외했습니다.")
+            chosen[section] = (data, name, c)
+
+    job.advance("페이지 파싱")
+    parsing = {
+        section: PROFILE_SECTIONS[c.instrument][1](data, name, c.instrument)
+        for section, (data, name, c) in chosen.items()
+    }
+    parsed = {}
+    for section, future in parsing.items():
+        try:
+            parsed[section] = future.result()
+        except Exception as e:  # ✅ 한 보고서 실패가 나머지 결과를 막지 않도록 경고로 남김
+            profile["경고"].append(f"{chosen[section][1]}: 추출 실패 ({type(e).__name__}: {e})")
+
+    job.advance("매칭")
+    if "TCI" in parsed:
+        profile["TCI"] = finish_tci(parsed["TCI"], get_temperament_dict())
+    if "PAT" in parsed:
+        profile["PAT"] = finish_pat(parsed["PAT"])
+
+    job.advance("정리")
+    if "지능검사" in parsed:
+        profile["지능검사"] = finish_iq(parsed["지능검사"])
+    return profile
+
+# -------------------------------
+# ✅ 세션 고정
+# -------------------------------
+def session_job(slot, upload, pipeline, stages):
+    """
+    ✅ 같은 업로드(내용 해시)면 세션에 저장된 작업을 그대로 반환
+       새 파일이면 백그라운드 작업을 시작하고 세션에 고정
+    """
+    data = upload.getvalue()
+    return _pinned(slot, content_digest(data), lambda: submit(pipeline, stages, data, upload.name))
+
+
+def session_profile_job(slot, uploads):
+    """✅ 여러 파일 통합 분석 — 파일 구성(내용 해시 집합)이 같으면 기존 작업 재사용"""
+    files = [(u.getvalue(), u.name) for u in uploads]
+    token = tuple(sorted(content_digest(data) for data, _ in files))
+    return _pinned(slot, token, lambda: submit(run_profile, PROFILE_STAGES, files))
+
+
+def _pinned(slot, token, start):
+    # 실패로 끝난 작업은 고정하지 않고 다시 시작 (Drive/참조 데이터 일시 장애 후 같은 파일 재시도)
+    pinned = st.session_state.get(slot)
+    if pinned is None or pinned[0] != token or pinned[1].failed:
+        st.session_state[slot] = (token, start())
+    return st.session_state[slot][1]
+
+
+def wait_with_progress(job, poll=0.2):
+    """
+    ✅ 진행 막대를 갱신하며 대기 — 대기 중 위젯을 조작하면 Streamlit이 이 루프만 중단하고
+       작업은 백그라운드에서 계속되어 다음 실행에서 결과를 이어받음
+    """
+    if job.done:
+        return job.result()
+    bar = st.progress(0.0, text="대기 중")
+    while not job.done:
+        step = job.stages.index(job.stage) + 1 if job.stage else 0
+        bar.progress(job.progress, text=f"{job.stage or '대기 중'} ({step}/{len(job.stages)})")
+        time.sleep(poll)
+    bar.empty()
+    return job.result()
@@ -0,0 +1,240 @@
+import os
+import random
+from dataclasses import dataclass, field
+
+import pymupdf
+
+from C import tci_scales, tci_codes
+from D import factors_order, evaluate_results
+from E import subtest_name_map as wais_subtest_name_map
+from F import wisc_domains, wisc_subtest_name_map
+
+# -------------------------------
+# ✅ 합성 검사 보고서 생성기 (실제 내담자 PDF 없이 파서 확인 / 벤치마크)
+#    각 검사 파서가 읽는 페이지 위치와 줄/열 배치를 그대로 재현하고,
+#    파서가 돌려줘야 할 기대 결과를 함께 반환
+# -------------------------------
+FONT = "korea"  # MuPDF 내장 CJK 글꼴 (한글 출력용)
+FONT_SIZE = 10
+LINE_HEIGHT = 16
+LEFT = 50
+COLUMN_WIDTH = 90
+
+REPORT_KINDS = ("WPPSI_4세이상", "WPPSI_4세미만", "WISC", "WAIS", "TCI", "PAT")
+
+# ✅ 표지 — 검사 판별(K.py)에 쓰이는 첫 페이지 문구
+COVERS = {
+    "WPPSI_4세이상": ["K-WPPSI-IV 한국 웩슬러 유아 지능검사", "결과 보고서 (4세 이상용)"],
+    "WPPSI_4세미만": ["K-WPPSI-IV 한국 웩슬러 유아 지능검사", "결과 보고서 (4세 미만용)"],
+    "WISC": ["K-WISC-V 한국 웩슬러 아동 지능검사", "결과 보고서"],
+    "WAIS": ["K-WAIS-IV 한국 웩슬러 성인 지능검사", "결과 보고서"],
+    "TCI": ["TCI 기질 및 성격검사", "결과 보고서"],
+    "PAT": ["PAT 부모양육태도검사", "결과 보고서"],
+}
+FILENAMES = {
+    "WPPSI_4세이상": "K-WPPSI-IV(유아용)_4세이상",
+    "WPPSI_4세미만": "K-WPPSI-IV(유아용)_4세미만",
+    "WISC": "K-WISC-V(아동용)",
+    "WAIS": "K-WAIS-IV(성인용)",
+    "TCI": "TCI",
+    "PAT": "PAT",
+}
+
+# ✅ WPPSI 소검사 표 행 순서 (G.py 이름 매핑과 같은 순서)
+WPPSI_SUBTESTS = {
+    "WPPSI_4세이상": ["토막짜기", "상식", "행렬추리", "동형찾기", "그림기억", "공통성",
+                  "공통그림찾기", "선택하기", "위치찾기", "모양맞추기", "어휘"],
+    "WPPSI_4세미만": ["수용어휘", "토막짜기", "그림기억", "상식", "모양맞추기", "위치찾기", "그림명명"],
+}
+WPPSI_SUBTEST_DOMAINS = {
+    "토막짜기": "시공간", "모양맞추기": "시공간", "상식": "언어이해", "공통성": "언어이해", "어휘": "언어이해",
+    "수용어휘": "언어이해", "그림명명": "언어이해", "행렬추리": "유동추론", "공통그림찾기": "유동추론",
+    "동형찾기": "처리속도", "선택하기": "처리속도", "그림기억": "작업기억", "위치찾기": "작업기억",
+}
+WPPSI_DOMAINS = {
+    "WPPSI_4세이상": ["언어이해", "시공간", "유동추론", "작업기억", "처리속도", "전체IQ"],
+    "WPPSI_4세미만": ["언어이해", "시공간", "작업기억", "전체IQ"],
+}
+# ✅ K-WISC-V 소검사 표 — F.py 줄 번호(1,2,5,6,7,8,11,12,14,15)에 핵심 소검사가 오는 순서
+WISC_SUBTEST_ROWS = ["공통성", "어휘", "상식", "이해", "토막짜기", "퍼즐", "행렬추리", "무게비교",
+                     "공통그림찾기", "산수", "숫자", "그림기억", "순차연결", "기호쓰기", "동형찾기", "선택"]
+WAIS_CODES = "SI VC IN CO BD MR VP DS AR SS CD"
+WAIS_DOMAINS = ["언어이해", "지각추론", "작업기억", "처리속도", "전체검사"]
+TCI_SUBSCALES = ["NS1", "NS2", "NS3", "NS4", "HA1", "HA2", "HA3", "HA4", "RD1", "RD2", "RD3", "RD4",
+                 "PS1", "PS2", "PS3", "PS4", "SD1", "SD2", "SD3", "SD4", "SD5",
+                 "CO1", "CO2", "CO3", "CO4", "CO5", "ST1", "ST2", "ST3"]
+CLASSIFICATIONS = ["매우 낮음", "낮음", "평균 하", "평균", "평균 상", "우수", "매우 우수"]
+
+
+@dataclass(frozen=True)
+class SyntheticReport:
+    kind: str
+    filename: str
+    data: bytes
+    expected: dict = field(default_factory=dict)
+
+# -------------------------------
+# ✅ PDF 그리기
+# -------------------------------
+def _render(pages, filler_pages=0):
+    """
+    ✅ pages: 페이지별 줄 목록 — 줄이 문자열이면 그대로, 리스트면 고정 열 위치에 칸별로 배치
+       filler_pages: 실제 보고서 길이를 흉내 내는 해석 문단 페이지 (파서가 읽지 않음)
+    """
+    doc = pymupdf.open()
+    for lines in pages + [_filler(i) for i in range(filler_pages)]:
+        page = doc.new_page()
+        y = 60
+        for line in lines:
+            cells = line if isinstance(line, list) else [line]
+            for col, cell in enumerate(cells):
+                if cell != "":
+                    page.insert_text((LEFT + COLUMN_WIDTH * col, y), str(cell), fontname=FONT, fontsize=FONT_SIZE)
+            y += LINE_HEIGHT
+    data = doc.tobytes(garbage=3, deflate=True)
+    doc.close()
+    return data
+
+
+def _filler(index):
+    return [f"해석 {index + 1}"] + [
+        "본 결과는 표준화 검사 절차에 따라 산출되었으며 임상적 판단과 함께 해석해야 합니다."
+    ] * 30
+
+
+def _index_row(rng):
+    total = rng.randint(8, 60)
+    score = rng.randint(60, 140)
+    percentile = f"{rng.uniform(0.1, 99.9):.1f}"
+    low, high = score - rng.randint(4, 9), score + rng.randint(4, 9)
+    return total, score, percentile, low, high, rng.choice(CLASSIFICATIONS), f"{rng.uniform(2.5, 6.0):.1f}"
+
+# -------------------------------
+# ✅ 검사별 보고서
+# -------------------------------
+def _wppsi(kind, rng):
+    names = WPPSI_SUBTESTS[kind]
+    scaled = {name: rng.randint(1, 19) for name in names}
+    subtest_page = ["소검사 점수 분석", ["소검사", "원점수", "환산점수", "백분위"]] + [
+        [name, rng.randint(5, 40), scaled[name], rng.randint(1, 99)] for name in names
+    ]
+
+    index_page = ["지표 점수 분석", "지표 환산점수합 지표점수 백분위 신뢰구간(95%) 진단분류 SEM"]
+    index = {}
+    for domain in WPPSI_DOMAINS[kind]:
+        total, score, pct, low, high, label, sem = _index_row(rng)
+        index_page.append(f"{domain} {total} {score} {pct} {low} - {high} ( {low - 2} - {high + 2} ) {label} {sem}")
+        index[domain] = {"환산점수합": str(total), "지표점수": str(score), "백분위": pct,
+                         "신뢰구간": f"{low}-{high}", "진단분류": label, "SEM": sem}
+
+    subtests = {f"{WPPSI_SUBTEST_DOMAINS[name]}_{name}": scaled[name] for name in names}
+    return [COVERS[kind], subtest_page, index_page], {"지표점수": index, "소검사점수": subtests}
+
+
+def _wisc(kind, rng):
+    scaled = {name: rng.randint(1, 19) for name in WISC_SUBTEST_ROWS}
+    subtest_page = [["소검사", "원점수", "환산점수", "백분위"]] + [
+        [name, rng.randint(5, 40), scaled[name], rng.randint(1, 99)] for name in WISC_SUBTEST_ROWS
+    ]
+
+    index_page = ["지표 점수 분석", "환산점수합 지표점수 백분위 신뢰구간 진단분류 SEM"]
+    index = {}
+    for domain in wisc_domains:
+        total, score, _, low, high, label, sem = _index_row(rng)
+        pct = str(rng.randint(1, 99))  # K-WISC-V 보고서의 백분위는 정수
+        index_page.append(f"{total} {score} {pct} {low}-{high} {label} {sem}")
+        index[domain] = {"환산점수합": str(total), "지표점수": str(score), "백분위": pct,
+                         "신뢰구간": f"{low}-{high}", "진단분류": label, "SEM": sem}
+
+    subtests = {f"{domain}_{name}": scaled[name] for domain, name in wisc_subtest_name_map}
+    return [COVERS[kind], subtest_page, index_page], {"지표점수": index, "소검사점수": subtests}
+
+
+def _wais(kind, rng):
+    scores = [rng.randint(1, 19) for _ in wais_subtest_name_map]
+    subtest_page = ["소검사 환산점수", WAIS_CODES, " ".join(map(str, scores))]
+
+    columns = {domain: {} for domain in WAIS_DOMAINS}
+    rows = {"환산점수합": [], "조합점수": [], "백분위": [], "95%신뢰구간": []}
+    for domain in WAIS_DOMAINS:
+        score = rng.randint(60, 140)
+        values = {
+            "환산점수합": str(rng.randint(8, 120)),
+            "조합점수": str(score),
+            "백분위": str(rng.randint(1, 99)),
+            "95%신뢰구간": f"{score - rng.randint(4, 9)}-{score + rng.randint(4, 9)}",
+        }
+        for label, value in values.items():
+            rows[label].append(value)
+        columns[domain] = values
+    index_page = ["조합점수 분석", "구분 VCI PRI WMI PSI FSIQ"] + [
+        " ".join([label] + values) for label, values in rows.items()
+    ]
+
+    subtests = {f"{domain}_{name}": s for (domain, name), s in zip(wais_subtest_name_map, scores)}
+    pages = [COVERS[kind], ["검사 정보", "검사 실시 일자와 수검 태도를 기록한 페이지입니다."], subtest_page, index_page]
+    return pages, {"지표점수": columns, "소검사점수": subtests}
+
+
+def _tci(kind, rng):
+    percentiles = {}
+    percentile_page = ["척도별 점수", "척도 원점수 T점수 백분위"]
+    for scale, code in zip(tci_scales, tci_codes):
+        p = rng.randint(1, 99)
+        percentile_page.append(f"{scale} {code} {rng.randint(5, 40)} {rng.randint(20, 80)} {p}")
+        percentiles[scale] = {"percentile": p, "level": "H" if p > 65 else "M" if p >= 35 else "L"}
+
+    m_sd = {}
+    m_sd_page = ["하위척도 원점수 M(SD)"]
+    for sub in TCI_SUBSCALES:
+        m, sd = round(rng.uniform(3, 20), 1), round(rng.uniform(1, 5), 1)
+        m_sd_page.append(f"{sub} {rng.randint(0, 20)} {m} ({sd})")
+        m_sd[sub] = {"M": m, "SD": sd}
+
+    percentile_page = COVERS[kind] + percentile_page  # TCI는 1페이지가 바로 백분위 표
+    return [percentile_page, m_sd_page], {"백분위": percentiles, "M(SD)": m_sd}
+
+
+def _pat(kind, rng):
+    numbers = [rng.randint(10, 99) for _ in factors_order]
+    pages = [
+        COVERS[kind],
+        ["검사 안내", "부모양육태도검사는 8개 요인으로 구성됩니다."],
+        ["요인별 백분위", " ".join(factors_order), " ".join(map(str, numbers))],
+    ]
+    return pages, {"백분위": numbers, "결과": evaluate_results(numbers)}
+
+
+BUILDERS = {
+    "WPPSI_4세이상": _wppsi,
+    "WPPSI_4세미만": _wppsi,
+    "WISC": _wisc,
+    "WAIS": _wais,
+    "TCI": _tci,
+    "PAT": _pat,
+}
+
+# -------------------------------
+# ✅ 공개 API
+# -------------------------------
+def make_report(kind, seed=0, filler_pages=0):
+    """✅ 합성 보고서 하나 — 같은 (kind, seed)면 같은 점수"""
+    if kind not in BUILDERS:
+        raise ValueError(f"지원하지 않는 보고서 종류: {kind}")
+    rng = random.Random(f"{kind}:{seed}")
+    pages, expected = BUILDERS[kind](kind, rng)
+    filename = f"{FILENAMES[kind]}_{seed:04d}.pdf"
+    return SyntheticReport(kind, filename, _render(pages, filler_pages), expected)
+
+
+def write_reports(folder, count=1, kinds=REPORT_KINDS, filler_pages=0, seed=0):
+    """✅ 종류별 count개씩 폴더에 저장 — 저장한 SyntheticReport 목록 반환 (data는 파일과 같음)"""
+    os.makedirs(folder, exist_ok=True)
+    reports = []
+    for kind in kinds:
+        for i in range(count):
+            report = make_report(kind, seed + i, filler_pages)
+            with open(os.path.join(folder, report.filename), "wb") as f:
+                f.write(report.data)
+            reports.append(report)
+    return reports
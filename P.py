@@ -0,0 +1,212 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from B import _extract_scores
+from C import extract_tci_percentiles, extract_tci_m_sd
+from D import extract_pat_percentiles_from_bytes
+from I import result_cache
+from J import available_cores, find_pdfs, run_batch
+from O import REPORT_KINDS, make_report, write_reports
+import Q
+
+# -------------------------------
+# ✅ 추출 벤치마크 (합성 보고서 기반)
+#    python P.py [--paths single,repeated,batch] [--runs 20] [--files 10] [--workers N] [--json out.json]
+#    - single   : 보고서마다 새로 열어 캐시 없이 추출 (지연 시간, Python 힙 최대 사용량)
+#    - repeated : 같은 PDF를 반복 추출 (첫 호출 vs 결과 캐시 적중)
+#    - batch    : J.run_batch로 폴더 일괄 처리 (초당 파일 수)
+# -------------------------------
+def _iq(report, cached=True):
+    func = _extract_scores if cached else _extract_scores.uncached
+    scores, _ = func(report.data, report.filename)
+    result = scores.to_dict()
+    return {k: result[k] for k in ("지표점수", "소검사점수")}
+
+
+def _tci(report, cached=True):
+    percentiles = extract_tci_percentiles if cached else extract_tci_percentiles.uncached
+    m_sd = extract_tci_m_sd if cached else extract_tci_m_sd.uncached
+    return {"백분위": percentiles(report.data), "M(SD)": m_sd(report.data)}
+
+
+def _pat(report, cached=True):
+    func = extract_pat_percentiles_from_bytes if cached else extract_pat_percentiles_from_bytes.uncached
+    return func(report.data)
+
+
+# 보고서 종류 → 추출 함수 (결과는 SyntheticReport.expected와 같은 형태)
+EXTRACTORS = {
+    "WPPSI_4세이상": _iq,
+    "WPPSI_4세미만": _iq,
+    "WISC": _iq,
+    "WAIS": _iq,
+    "TCI": _tci,
+    "PAT": _pat,
+}
+
+
+def _latency_summary(samples):
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def peak_rss_mb():
+    """✅ 프로세스 최대 RSS (MuPDF 등 C 메모리 포함)"""
+    return round(Q.peak_rss_bytes() / (1024 * 1024), 1)
+
+# -------------------------------
+# ✅ 경로별 측정
+# -------------------------------
+def bench_single(kinds, runs, filler_pages):
+    """✅ 매번 다른 합성 보고서, 결과 캐시 없이 — 검사별 지연 시간 / 처리량 / Python 힙 최대치"""
+    results = {}
+    for kind in kinds:
+        extract = EXTRACTORS[kind]
+        reports = [make_report(kind, seed, filler_pages) for seed in range(runs)]
+        extract(reports[0], cached=False)  # 모듈/글꼴 초기화는 측정에서 제외
+
+        samples, mismatches = [], 0
+        for report in reports:
+            started = time.perf_counter()
+            got = extract(report, cached=False)
+            samples.append(time.perf_counter() - started)
+            mismatches += got != report.expected
+
+        # tracemalloc은 지연 시간을 늘리므로 따로 한 번 측정
+        tracemalloc.start()
+        extract(reports[0], cached=False)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[kind] = {
+            **_latency_summary(samples),
+            "files_per_sec": round(len(samples) / sum(samples), 2),
+            "peak_heap_mb": round(peak / (1024 * 1024), 2),
+            "mismatches": mismatches,
+        }
+    return results
+
+
+def bench_repeated(kinds, runs, filler_pages):
+    """✅ 같은 PDF를 runs번 추출 (Streamlit 재실행/재업로드) — 첫 호출과 이후 호출 비교"""
+    results = {}
+    for kind in kinds:
+        extract = EXTRACTORS[kind]
+        report = make_report(kind, 0, filler_pages)
+        result_cache.clear()
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            extract(report)
+            samples.append(time.perf_counter() - started)
+        results[kind] = {
+            "first_ms": round(samples[0] * 1000, 3),
+            **_latency_summary(samples[1:] or samples),
+        }
+    return results
+
+
+class _CountingWriter:
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+
+def bench_batch(kinds, files, filler_pages, workers):
+    """✅ 종류별 files개 합성 보고서 폴더를 J.run_batch로 처리"""
+    with tempfile.TemporaryDirectory(prefix="bench_") as folder:
+        reports = {r.filename: r for r in write_reports(folder, files, kinds, filler_pages)}
+        writer = _CountingWriter()
+        started = time.perf_counter()
+        with contextlib.redirect_stderr(io.StringIO()):  # 파일별 진행 출력 숨김
+            done, failed = run_batch(find_pdfs(folder), writer, workers)
+        elapsed = time.perf_counter() - started
+
+    per_file = [r["seconds"] for r in writer.records]
+    wrong_instrument = sum(
+        1 for r in writer.records
+        if not reports[os.path.basename(r["file"])].kind.startswith(r["instrument"] or "-")
+    )
+    return {
+        "files": done,
+        "failed": failed,
+        "wrong_instrument": wrong_instrument,
+        "workers": workers or available_cores(),
+        "seconds": round(elapsed, 3),
+        "files_per_sec": round(done / elapsed, 2),
+        "per_file": _latency_summary(per_file),
+    }
+
+
+PATHS = ("single", "repeated", "batch")
+
+# -------------------------------
+# ✅ 출력
+# -------------------------------
+def _print_table(title, rows):
+    print(f"\n▶ {title}")
+    if not rows:
+        return
+    columns = list(next(iter(rows.values())))
+    print("\t".join(["보고서"] + columns))
+    for name, values in rows.items():
+        print("\t".join([name] + [str(values[c]) for c in columns]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="합성 보고서로 추출 지연 시간/메모리/처리량 측정")
+    parser.add_argument("--paths", default=",".join(PATHS), help=f"측정 경로 (쉼표 구분, 기본: {','.join(PATHS)})")
+    parser.add_argument("--kinds", default=",".join(REPORT_KINDS), help="보고서 종류 (쉼표 구분)")
+    parser.add_argument("--runs", type=int, default=20, help="single/repeated 반복 횟수")
+    parser.add_argument("--files", type=int, default=10, help="batch에서 종류별 파일 수")
+    parser.add_argument("--workers", type=int, default=None, help="batch 프로세스 수 (기본: 사용 가능한 코어 수)")
+    parser.add_argument("--filler-pages", type=int, default=8, help="보고서마다 덧붙일 해석 페이지 수")
+    parser.add_argument("--json", default=None, help="결과를 JSON 파일로도 저장")
+    args = parser.parse_args(argv)
+
+    paths = [p for p in args.paths.split(",") if p]
+    kinds = [k for k in args.kinds.split(",") if k]
+    unknown = set(paths) - set(PATHS) or set(kinds) - set(REPORT_KINDS)
+    if unknown:
+        parser.error(f"알 수 없는 값: {', '.join(sorted(unknown))}")
+
+    report = {"runs": args.runs, "filler_pages": args.filler_pages}
+    if "single" in paths:
+        report["single"] = bench_single(kinds, args.runs, args.filler_pages)
+        _print_table("single (캐시 없음)", report["single"])
+    if "repeated" in paths:
+        report["repeated"] = bench_repeated(kinds, args.runs, args.filler_pages)
+        _print_table("repeated (결과 캐시)", report["repeated"])
+    if "batch" in paths:
+        report["batch"] = bench_batch(kinds, args.files, args.filler_pages, args.workers)
+        print("\n▶ batch")
+        print(json.dumps(report["batch"], ensure_ascii=False))
+    report["peak_rss_mb"] = peak_rss_mb()
+    print(f"\n최대 RSS: {report['peak_rss_mb']} MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    mismatches = sum(v["mismatches"] for v in report.get("single", {}).values())
+    batch_errors = report.get("batch", {}).get("failed", 0) + report.get("batch", {}).get("wrong_instrument", 0)
+    return 1 if mismatches or batch_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
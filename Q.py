@@ -0,0 +1,281 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# -------------------------------
+# ✅ 단계별 계측 (운영 중에도 켜 둘 수 있는 가벼운 지표)
+#    - 단계 시간: 히스토그램 pdf_stage_seconds{stage=...}
+#    - 페이지 수 / 바이트 / 캐시 적중: 카운터
+#    - 프로세스별 최대 RSS: 게이지 (합치면 최댓값)
+#    - 구조화 로그: "metrics" 로거 INFO에 단계별 JSON 한 줄 (로거가 꺼져 있으면 비용 없음)
+#    - 내보내기: Prometheus 텍스트 형식 — METRICS_FILE(주기적 파일) / METRICS_PORT(HTTP)
+# -------------------------------
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_HELP = {
+    "pdf_stage_seconds": ("histogram", "추출 단계별 소요 시간(초)"),
+    "pdf_stage_errors_total": ("counter", "예외로 끝난 단계 수"),
+    "pdf_documents_total": ("counter", "연 PDF 문서 수"),
+    "pdf_bytes_total": ("counter", "연 PDF 원본 바이트"),
+    "pdf_pages_total": ("counter", "백엔드별 텍스트/단어를 추출한 페이지 수"),
+    "result_cache_total": ("counter", "결과 캐시 조회 (result=hit|miss)"),
+    "reference_bytes_total": ("counter", "내려받은 참조 데이터 바이트"),
+    "queue_jobs_total": ("counter", "작업 큐에서 끝낸 작업 (status=done|retry|failed|duplicate)"),
+    "process_peak_rss_bytes": ("gauge", "프로세스(워커)별 최대 RSS 바이트"),
+}
+
+logger = logging.getLogger("metrics")
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Metrics:
+    """✅ 프로세스 안의 지표 저장소 — 스레드 안전, 다른 프로세스 결과는 merge()로 합침"""
+
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}  # (이름, 라벨) → [버킷별 개수..., 합계, 개수]
+        self._gauges = {}  # (이름, 라벨) → 최댓값
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_max(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._gauges[key] = max(self._gauges.get(key, value), value)
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            h = self._histograms.get(key)
+            if h is None:
+                h = self._histograms[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    h[i] += 1
+                    break
+            else:
+                h[len(self.buckets)] += 1  # +Inf
+            h[-2] += value
+            h[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "histograms": {k: list(v) for k, v in self._histograms.items()},
+                "gauges": dict(self._gauges),
+            }
+
+    def drain(self):
+        """✅ 현재 값을 돌려주고 비움 (워커 프로세스 → 부모로 넘길 때)"""
+        with self._lock:
+            data = {"counters": self._counters, "histograms": self._histograms, "gauges": self._gauges}
+            self._counters, self._histograms, self._gauges = {}, {}, {}
+            return data
+
+    def merge(self, data):
+        with self._lock:
+            for key, value in data["counters"].items():
+                self._counters[key] = self._counters.get(key, 0) + value
+            for key, values in data["histograms"].items():
+                h = self._histograms.setdefault(key, [0] * len(values))
+                for i, v in enumerate(values):
+                    h[i] += v
+            for key, value in data.get("gauges", {}).items():
+                self._gauges[key] = max(self._gauges.get(key, value), value)
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._gauges.clear()
+
+    def render(self):
+        """✅ Prometheus 텍스트 노출 형식 (버킷은 누적값)"""
+        data = self.snapshot()
+        series = {}
+        for (name, labels), value in {**data["counters"], **data["gauges"]}.items():
+            series.setdefault(name, []).append((labels, value))
+        for (name, labels), value in data["histograms"].items():
+            series.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name in sorted(series):
+            kind, help_text = METRIC_HELP.get(name, ("counter", name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(series[name]):
+                if kind != "histogram":
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), value[:-2]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value[-2])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {value[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (f'{k}="{v}"'.replace("\n", "\\n") for k, v in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value):
+    return repr(round(value, 6)) if isinstance(value, float) else str(value)
+
+
+metrics = Metrics()
+
+# -------------------------------
+# ✅ 계측 API
+# -------------------------------
+def inc(name, value=1, **labels):
+    metrics.inc(name, value, **labels)
+
+
+@contextmanager
+def stage(name, **labels):
+    """✅ with stage("open", backend="pymupdf"): ... — 소요 시간 기록, 예외는 그대로 전달"""
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        metrics.observe("pdf_stage_seconds", seconds, stage=name, **labels)
+        if error is not None:
+            metrics.inc("pdf_stage_errors_total", stage=name, **labels)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(
+                {"stage": name, "seconds": round(seconds, 6), **labels, **({"error": error} if error else {})},
+                ensure_ascii=False,
+            ))
+
+
+def timed(name, **labels):
+    """✅ 함수 전체를 한 단계로 계측하는 데코레이터"""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name, **labels):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def peak_rss_bytes():
+    """✅ 이 프로세스의 최대 RSS (MuPDF/pdfminer 등 C 메모리 포함, 리눅스 KB / macOS 바이트)"""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def record_peak_rss():
+    try:
+        metrics.set_max("process_peak_rss_bytes", peak_rss_bytes(), pid=os.getpid())
+    except ImportError:  # resource 모듈이 없는 윈도우
+        pass
+
+
+def call_with_metrics(func, *args, **kwargs):
+    """✅ 프로세스 풀 워커에서 실행 — (결과, 이 호출 동안 쌓인 지표 + 워커 최대 RSS) 반환, 부모는 merge()"""
+    metrics.drain()  # 이전 작업에서 남은 값 제거
+    result = func(*args, **kwargs)
+    record_peak_rss()
+    return result, metrics.drain()
+
+
+def peak_rss_by_process():
+    """✅ {pid: 최대 RSS 바이트} — 이 프로세스 + merge()로 합친 워커들"""
+    record_peak_rss()
+    return {
+        int(dict(labels)["pid"]): value
+        for (name, labels), value in metrics.snapshot()["gauges"].items()
+        if name == "process_peak_rss_bytes"
+    }
+
+# -------------------------------
+# ✅ 내보내기 (파일 / HTTP)
+# -------------------------------
+def write_prometheus(path):
+    record_peak_rss()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(metrics.render())
+    os.replace(tmp_path, path)  # ✅ 수집기가 반쯤 쓴 파일을 읽지 않도록 원자적 교체
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        record_peak_rss()
+        body = metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # 수집기 요청마다 접근 로그를 남기지 않음
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def start_exporters(file_path=None, port=None, interval=None):
+    """
+    ✅ 환경변수(METRICS_FILE / METRICS_PORT / METRICS_INTERVAL) 또는 인자로 내보내기 시작
+       프로세스당 한 번만 시작 (Streamlit 재실행마다 호출해도 안전)
+    """
+    global _exporters_started
+    file_path = file_path or os.environ.get("METRICS_FILE")
+    port = port or os.environ.get("METRICS_PORT")
+    interval = float(interval or os.environ.get("METRICS_INTERVAL", "15"))
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+
+    if file_path:
+        def write_loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    write_prometheus(file_path)
+                except OSError:
+                    logger.warning("지표 파일 저장 실패: %s", file_path, exc_info=True)
+
+        threading.Thread(target=write_loop, name="metrics-file", daemon=True).start()
+    if port:
+        server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
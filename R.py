@@ -0,0 +1,95 @@
+from dataclasses import dataclass
+
+# -------------------------------
+# ✅ 지능검사 추출 결과 타입 (불변, 고정 필드)
+#    추출 함수는 모듈 전역을 건드리지 않고 이 객체만 돌려줌 → 스레드/프로세스 풀에서 동시 호출 가능
+#    값은 PDF 원문 문자열 그대로 (소검사 환산점수만 정수)
+#    to_dict()는 기존 dict 형태 (JSON/CSV 출력, 이전 결과와 비교용)
+# -------------------------------
+@dataclass(frozen=True, slots=True)
+class IndexScore:
+    """✅ K-WPPSI / K-WISC 지표 점수 한 줄"""
+    domain: str
+    환산점수합: str
+    지표점수: str
+    백분위: str
+    신뢰구간: str
+    진단분류: str
+    SEM: str
+
+    def to_dict(self):
+        return {
+            "환산점수합": self.환산점수합, "지표점수": self.지표점수, "백분위": self.백분위,
+            "신뢰구간": self.신뢰구간, "진단분류": self.진단분류, "SEM": self.SEM,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class CompositeScore:
+    """✅ K-WAIS 조합점수 한 열"""
+    domain: str
+    환산점수합: str
+    조합점수: str
+    백분위: str
+    신뢰구간: str  # 95% 신뢰구간
+
+    def to_dict(self):
+        return {
+            "환산점수합": self.환산점수합, "조합점수": self.조합점수,
+            "백분위": self.백분위, "95%신뢰구간": self.신뢰구간,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class SubtestScore:
+    """✅ 소검사 환산점수 (탐지되지 않으면 None)"""
+    domain: str
+    name: str
+    환산점수: int = None
+
+    @property
+    def key(self):
+        return f"{self.domain}_{self.name}".replace(" ", "_")
+
+
+# to_dict()의 지표 항목 → 결과 타입 (K-WAIS만 조합점수)
+def _index_score(domain, values):
+    if "조합점수" in values:
+        return CompositeScore(domain, values.get("환산점수합", ""), values["조합점수"],
+                              values.get("백분위", ""), values.get("95%신뢰구간", ""))
+    return IndexScore(domain, **{k: values.get(k, "") for k in
+                                 ("환산점수합", "지표점수", "백분위", "신뢰구간", "진단분류", "SEM")})
+
+
+@dataclass(frozen=True, slots=True)
+class IQResult:
+    """✅ 지능검사 보고서 하나의 추출 결과"""
+    instrument: str = None
+    index: tuple = ()  # IndexScore 또는 CompositeScore
+    subtests: tuple = ()  # SubtestScore
+
+    def __deepcopy__(self, memo):
+        return self  # 모든 필드가 불변 → 결과 캐시가 돌려줄 때 복사하지 않음
+
+    def index_by_domain(self):
+        return {s.domain: s for s in self.index}
+
+    @classmethod
+    def from_dict(cls, data):
+        """✅ to_dict() 형태(J.py 배치 결과 JSON)에서 복원"""
+        subtests = []
+        for key, value in data.get("소검사점수", {}).items():
+            domain, _, name = key.partition("_")
+            subtests.append(SubtestScore(domain, name, value))
+        return cls(
+            data.get("검사"),
+            tuple(_index_score(domain, values) for domain, values in data.get("지표점수", {}).items()),
+            tuple(subtests),
+        )
+
+    def to_dict(self):
+        return {
+            "검사": self.instrument,
+            "지표점수": {s.domain: s.to_dict() for s in self.index},
+            "소검사점수": {s.key: s.환산점수 for s in self.subtests},
+        }
@@ -0,0 +1,153 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet/Arrow 내보내기만 쓸 수 없음 (DataFrame 변환은 그대로)
+    pa = None
+
+from R import IQResult
+
+# -------------------------------
+# ✅ 열 형식 점수 표 (연구용 대량 집계)
+#    IQResult 여러 개 → 지표 표 / 소검사 표 DataFrame 하나씩
+#    - 점수는 정수(Int16, 누락은 <NA>), 신뢰구간은 하한/상한 정수 두 열
+#    - 백분위는 K-WPPSI처럼 소수(예: 0.1, 50.0)가 있어 float32
+#    - 검사/지표/진단분류/보고서 ID는 category (행이 많아도 문자열은 한 번만 저장)
+# -------------------------------
+INDEX_COLUMNS = {
+    "보고서": "category",
+    "검사": "category",
+    "지표": "category",
+    "환산점수합": "Int16",
+    "지표점수": "Int16",  # K-WAIS는 조합점수
+    "백분위": "float32",
+    "신뢰구간_하한": "Int16",
+    "신뢰구간_상한": "Int16",
+    "진단분류": "category",
+    "SEM": "float32",
+}
+SUBTEST_COLUMNS = {
+    "보고서": "category",
+    "검사": "category",
+    "지표": "category",
+    "소검사": "category",
+    "환산점수": "Int16",
+}
+
+
+def _int(text):
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def _float(text):
+    try:
+        return float(str(text).strip("<>≤≥ "))  # "<0.1" 같은 백분위 표기
+    except ValueError:
+        return np.nan
+
+
+def parse_interval(text):
+    """✅ "92-108" → (92, 108), 형식이 다르면 (None, None)"""
+    low, sep, high = str(text).partition("-")
+    if not sep:
+        return None, None
+    return _int(low.strip()), _int(high.strip())
+
+
+def _items(results):
+    return results.items() if isinstance(results, dict) else results
+
+
+def _frame(columns, dtypes):
+    return pd.DataFrame({
+        name: pd.array(values, dtype=dtypes[name]) if dtypes[name] != "category"
+        else pd.Categorical(values)
+        for name, values in columns.items()
+    })
+
+
+def index_frame(results):
+    """✅ results: {보고서 ID: IQResult} 또는 (보고서 ID, IQResult) 목록 → 지표 표 (보고서 × 지표)"""
+    columns = {name: [] for name in INDEX_COLUMNS}
+    for report, result in _items(results):
+        for s in result.index:
+            low, high = parse_interval(s.신뢰구간)
+            columns["보고서"].append(report)
+            columns["검사"].append(result.instrument)
+            columns["지표"].append(s.domain)
+            columns["환산점수합"].append(_int(s.환산점수합))
+            columns["지표점수"].append(_int(getattr(s, "지표점수", None) or getattr(s, "조합점수", None)))
+            columns["백분위"].append(_float(s.백분위))
+            columns["신뢰구간_하한"].append(low)
+            columns["신뢰구간_상한"].append(high)
+            columns["진단분류"].append(getattr(s, "진단분류", None) or None)
+            columns["SEM"].append(_float(getattr(s, "SEM", "")))
+    return _frame(columns, INDEX_COLUMNS)
+
+
+def subtest_frame(results):
+    """✅ 소검사 표 (보고서 × 소검사)"""
+    columns = {name: [] for name in SUBTEST_COLUMNS}
+    for report, result in _items(results):
+        for s in result.subtests:
+            columns["보고서"].append(report)
+            columns["검사"].append(result.instrument)
+            columns["지표"].append(s.domain)
+            columns["소검사"].append(s.name)
+            columns["환산점수"].append(s.환산점수)
+    return _frame(columns, SUBTEST_COLUMNS)
+
+# -------------------------------
+# ✅ 불러오기 (J.py 배치 결과) / 내보내기 (Arrow, Parquet)
+# -------------------------------
+def read_jsonl(path):
+    """✅ J.py JSONL 결과에서 지능검사 성공 건만 (파일 경로, IQResult)로 하나씩 읽음"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("status") == "ok" and record.get("instrument") in ("WPPSI", "WISC", "WAIS"):
+                yield record["file"], IQResult.from_dict(record["result"])
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet/Arrow 내보내기에는 pyarrow가 필요합니다 (pip install pyarrow).")
+
+
+def arrow_schema(dtypes):
+    """✅ 열 타입 선언 → 고정 Arrow 스키마
+    빈 표나 값이 모두 누락된 열도 같은 타입으로 저장 → part 파일 여러 개를 한 번에 읽을 수 있음"""
+    _require_pyarrow()
+    types = {
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        "Int16": pa.int16(),
+        "float32": pa.float32(),
+        "float64": pa.float64(),
+        "string": pa.string(),
+    }
+    return pa.schema([(name, types[dtype]) for name, dtype in dtypes.items()])
+
+
+def to_arrow(frame, schema=None):
+    _require_pyarrow()
+    return pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+
+
+def write_parquet(frame, path, schema=None):
+    pq.write_table(to_arrow(frame, schema), path, compression="zstd")
+
+
+def export_parquet(results, prefix):
+    """✅ <prefix>_지표.parquet, <prefix>_소검사.parquet 저장 — 저장한 경로 두 개 반환"""
+    results = list(_items(results))
+    paths = f"{prefix}_지표.parquet", f"{prefix}_소검사.parquet"
+    write_parquet(index_frame(results), paths[0], arrow_schema(INDEX_COLUMNS))
+    write_parquet(subtest_frame(results), paths[1], arrow_schema(SUBTEST_COLUMNS))
+    return paths
@@ -0,0 +1,369 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from H import content_digest
+import Q
+
+# -------------------------------
+# ✅ 재개 가능한 일괄 처리 작업 큐 (SQLite 파일 하나)
+#    python J.py <폴더> --queue jobs.db -o results.jsonl
+#    python T.py jobs.db [--retry-failed]         ← 상태 확인 / 실패 건 다시 대기열로
+#    - 파일마다 상태(pending/running/done/failed), 내용 해시, 시도 횟수, 소요 시간, 오류, 결과를 기록
+#    - 워커 프로세스가 큐에서 직접 하나씩 가져감 → 코어 수만 바꾸면 노트북부터 다코어 서버까지 그대로
+#    - 중단 후 같은 명령을 다시 실행하면 done은 건너뛰고 나머지만 처리
+#    - 일시적 실패(입출력/시간 초과 등)는 지수 백오프로 재시도, max_attempts번 실패하면 failed
+#      손상된 PDF처럼 다시 해도 같은 실패는 바로 failed
+# -------------------------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime REAL,
+    digest TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    lease_until REAL,
+    worker TEXT,
+    started_at REAL,
+    finished_at REAL,
+    seconds REAL,
+    error TEXT,
+    record TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS jobs_digest ON jobs(digest);
+"""
+
+STATUSES = ("pending", "running", "done", "failed")
+
+MAX_ATTEMPTS = 3
+BACKOFF_SECONDS = 5.0  # 재시도 대기: 5초, 10초, 20초 ... (최대 BACKOFF_MAX)
+BACKOFF_MAX = 300.0
+LEASE_SECONDS = 3600.0  # running 상태가 이 시간을 넘기면 워커가 죽은 것으로 보고 다시 가져감
+POLL_SECONDS = 1.0
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """✅ SQLite 작업 큐 — 프로세스마다 따로 열어서 사용 (연결은 프로세스 간에 넘기지 않음)"""
+
+    def __init__(self, path, lease_seconds=LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        # ✅ 자동 커밋 모드, 가져가기(claim)만 BEGIN IMMEDIATE로 묶어 두 워커가 같은 파일을 잡지 않게 함
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")  # 읽기와 쓰기가 서로 막지 않음
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    @contextmanager
+    def _transaction(self):
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def add(self, paths):
+        """
+        ✅ 파일 등록 — 새 파일은 pending, 이미 있는 파일은 그대로 (done이면 건너뜀)
+           단, 크기/수정 시각이 바뀐 파일은 다시 pending
+        """
+        rows = []
+        for path in paths:
+            st = os.stat(path)
+            rows.append((path, st.st_size, st.st_mtime))
+        before = self._db.total_changes
+        with self._transaction():
+            self._db.executemany(
+                """
+                INSERT INTO jobs (path, size, mtime) VALUES (?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    size = excluded.size, mtime = excluded.mtime, digest = NULL,
+                    status = 'pending', attempts = 0, next_attempt_at = 0, error = NULL, record = NULL
+                WHERE jobs.status != 'running' AND (jobs.size != excluded.size OR jobs.mtime != excluded.mtime)
+                """,
+                rows,
+            )
+        return self._db.total_changes - before
+
+    def reclaim(self):
+        """✅ 이 컴퓨터에서 죽은 워커가 잡고 있던 running 작업을 바로 pending으로 (강제 종료 후 재실행)"""
+        host = socket.gethostname()
+        stale = [
+            path for path, worker in self._db.execute("SELECT path, worker FROM jobs WHERE status = 'running'")
+            if worker and worker.rpartition(":")[0] == host and not _pid_alive(int(worker.rpartition(":")[2]))
+        ]
+        with self._transaction():
+            self._db.executemany(
+                "UPDATE jobs SET status = 'pending', error = '워커 중단', lease_until = NULL WHERE path = ?",
+                [(p,) for p in stale],
+            )
+        return len(stale)
+
+    def claim(self):
+        """✅ 처리할 작업 하나를 running으로 바꾸고 (경로, 시도 횟수) 반환, 없으면 None"""
+        now = time.time()
+        with self._transaction():
+            row = self._db.execute(
+                """
+                SELECT path FROM jobs
+                WHERE (status = 'pending' AND next_attempt_at <= ?) OR (status = 'running' AND lease_until < ?)
+                ORDER BY next_attempt_at, rowid LIMIT 1
+                """,
+                (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                """
+                UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?,
+                    started_at = ?, lease_until = ?
+                WHERE path = ?
+                """,
+                (worker_id(), now, now + self.lease_seconds, row[0]),
+            )
+            attempts = self._db.execute("SELECT attempts FROM jobs WHERE path = ?", row).fetchone()[0]
+        return row[0], attempts
+
+    def next_wait(self):
+        """✅ 다음 재시도까지 남은 초 — 대기 중인 작업이 없으면 None (워커 종료)"""
+        row = self._db.execute("SELECT MIN(next_attempt_at) FROM jobs WHERE status = 'pending'").fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def set_digest(self, path, digest):
+        self._db.execute("UPDATE jobs SET digest = ? WHERE path = ?", (digest, path))
+
+    def find_done(self, digest, path):
+        """✅ 내용이 같은 파일이 이미 처리됐으면 그 결과 레코드 (복사본 파일은 다시 추출하지 않음)"""
+        row = self._db.execute(
+            "SELECT record FROM jobs WHERE digest = ? AND status = 'done' AND path != ? LIMIT 1",
+            (digest, path),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def complete(self, path, record):
+        self._db.execute(
+            """
+            UPDATE jobs SET status = 'done', finished_at = ?, seconds = ?, error = NULL,
+                record = ?, lease_until = NULL
+            WHERE path = ?
+            """,
+            (time.time(), record.get("seconds"), json.dumps(record, ensure_ascii=False), path),
+        )
+
+    def fail(self, path, record, attempts, max_attempts=MAX_ATTEMPTS, backoff=BACKOFF_SECONDS, retry=True):
+        """✅ 재시도할 수 있으면 백오프 후 pending, 아니면(retry=False 포함) failed — 반환: 최종 상태"""
+        status = "failed" if not retry or attempts >= max_attempts else "pending"
+        delay = min(BACKOFF_MAX, backoff * 2 ** (attempts - 1))
+        self._db.execute(
+            """
+            UPDATE jobs SET status = ?, next_attempt_at = ?, finished_at = ?, seconds = ?,
+                error = ?, record = ?, lease_until = NULL
+            WHERE path = ?
+            """,
+            (status, time.time() + delay, time.time(), record.get("seconds"), record.get("error"),
+             json.dumps(record, ensure_ascii=False), path),
+        )
+        return status
+
+    def retry_failed(self):
+        before = self._db.total_changes
+        self._db.execute(
+            "UPDATE jobs SET status = 'pending', attempts = 0, next_attempt_at = 0 WHERE status = 'failed'"
+        )
+        return self._db.total_changes - before
+
+    def counts(self):
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+        return counts
+
+    def failures(self):
+        yield from self._db.execute(
+            "SELECT path, attempts, error FROM jobs WHERE status = 'failed' ORDER BY path"
+        )
+
+    def records(self):
+        """✅ 끝난 작업(done/failed)의 결과 레코드를 완료 순서대로 하나씩 (J.py 출력 형식)"""
+        for (record,) in self._db.execute(
+            "SELECT record FROM jobs WHERE status IN ('done', 'failed') ORDER BY finished_at, rowid"
+        ):
+            yield json.loads(record)
+
+# -------------------------------
+# ✅ 워커 — 큐가 빌 때까지 직접 가져가서 처리
+# -------------------------------
+class JobTimeout(BaseException):
+    """✅ BaseException — 추출 함수의 `except Exception`(J.process_file 등)에 잡히지 않고 워커까지 올라옴"""
+
+
+# 다시 시도하면 성공할 수 있는 오류 (레코드 error의 "형식: 메시지" 앞부분)
+# 그 밖의 오류(손상된 PDF, 검사 종류 판별 불가 등)는 몇 번을 다시 해도 같으므로 바로 failed
+TRANSIENT_ERRORS = frozenset({
+    "OSError", "IOError", "PermissionError", "BlockingIOError", "InterruptedError",
+    "TimeoutError", "ConnectionError", "MemoryError", "JobTimeout",
+})
+
+
+def is_transient(error):
+    return (error or "").partition(":")[0] in TRANSIENT_ERRORS
+
+
+@contextmanager
+def _time_limit(seconds):
+    """✅ 파일 하나가 멈춰 워커를 계속 잡고 있지 않도록 (SIGALRM이 있는 유닉스만)"""
+    if not seconds or not hasattr(signal, "SIGALRM"):
+        yield
+        return
+
+    def handler(signum, frame):
+        raise JobTimeout(f"{seconds}초 초과")
+
+    previous = signal.signal(signal.SIGALRM, handler)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _error_record(path, error):
+    return {"file": path, "instrument": None, "confidence": 0.0, "status": "error",
+            "error": error, "result": {}, "seconds": 0.0}
+
+
+def run_worker(db_path, func, max_attempts=MAX_ATTEMPTS, backoff=BACKOFF_SECONDS, timeout=None):
+    """
+    ✅ 워커 프로세스 본체 — func(path)는 J.process_file 형태의 레코드를 돌려줌
+       반환: (처리한 작업 수, 이 워커의 지표) → 부모가 Q.metrics.merge()
+    """
+    Q.metrics.drain()
+    queue = JobQueue(db_path, lease_seconds=max(LEASE_SECONDS, 2 * (timeout or 0)))
+    processed = 0
+    try:
+        while True:
+            job = queue.claim()
+            if job is None:
+                wait = queue.next_wait()
+                if wait is None:
+                    break
+                time.sleep(min(max(wait, 0.05), POLL_SECONDS))  # 백오프 중인 재시도 대기
+                continue
+
+            path, attempts = job
+            try:
+                digest = content_digest(path)
+            except OSError as e:
+                record = _error_record(path, f"{type(e).__name__}: {e}")
+            else:
+                queue.set_digest(path, digest)
+                record = queue.find_done(digest, path)
+                if record is not None:
+                    record = {**record, "file": path, "seconds": 0.0}
+                    Q.inc("queue_jobs_total", status="duplicate")
+                else:
+                    try:
+                        with _time_limit(timeout):
+                            record = func(path)
+                    except JobTimeout as e:
+                        record = _error_record(path, f"JobTimeout: {e}")
+
+            if record["status"] == "ok":
+                queue.complete(path, record)
+                status = "done"
+            else:
+                status = queue.fail(path, record, attempts, max_attempts, backoff,
+                                    retry=is_transient(record.get("error")))
+                status = "retry" if status == "pending" else status
+            Q.inc("queue_jobs_total", status=status)
+            processed += 1
+            print(f"[{worker_id()}] {status} {path}", file=sys.stderr)
+    finally:
+        queue.close()
+    Q.record_peak_rss()
+    return processed, Q.metrics.drain()
+
+
+def run_queue(db_path, paths, func, workers, max_attempts=MAX_ATTEMPTS, backoff=BACKOFF_SECONDS, timeout=None,
+              initializer=None):
+    """✅ 파일 등록 → 워커 workers개 실행 → 상태별 개수 반환 (initializer: 워커 프로세스 초기화, 예: M.run_inline)"""
+    queue = JobQueue(db_path)
+    try:
+        added = queue.add(paths)
+        reclaimed = queue.reclaim()
+        counts = queue.counts()
+    finally:
+        queue.close()
+    print(f"↻ 새로 등록 {added}개, 중단된 작업 복구 {reclaimed}개, 이미 완료 {counts['done']}개",
+          file=sys.stderr)
+
+    workers = max(1, min(workers, counts["pending"] + counts["running"]))
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer) as pool:
+        futures = [
+            pool.submit(run_worker, db_path, func, max_attempts, backoff, timeout)
+            for _ in range(workers)
+        ]
+        for future in futures:
+            _, worker_metrics = future.result()
+            Q.metrics.merge(worker_metrics)
+
+    queue = JobQueue(db_path)
+    try:
+        return queue.counts()
+    finally:
+        queue.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="작업 큐 상태 확인")
+    parser.add_argument("db", help="J.py --queue로 만든 SQLite 파일")
+    parser.add_argument("--retry-failed", action="store_true", help="failed 작업을 다시 pending으로")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        parser.error(f"작업 큐 파일이 없습니다: {args.db}")
+    queue = JobQueue(args.db)
+    try:
+        if args.retry_failed:
+            print(f"↻ {queue.retry_failed()}개 작업을 다시 대기열에 넣었습니다.")
+        print(json.dumps(queue.counts(), ensure_ascii=False))
+        for path, attempts, error in queue.failures():
+            print(f"failed\t{attempts}회\t{path}\t{error}")
+    finally:
+        queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,523 @@
+import re
+from dataclasses import dataclass, field
+
+from H import column_values, INSTRUMENT_PAGES
+from Q import stage
+from R import CompositeScore, IndexScore, SubtestScore
+
+# -------------------------------
+# ✅ 선언형 검사 명세 + 공용 파싱 엔진
+#    검사(판)마다 "어느 페이지의 어떤 표를 어떤 규칙으로 읽는지"만 SPECS에 적고,
+#    정규식/라벨 색인은 import 시 한 번 컴파일 → 페이지 텍스트는 한 번만 줄로 나눠 그 페이지의 모든 규칙이 공유,
+#    빠른 경로 검증(validate)에서 파싱한 결과를 그대로 최종 결과로 사용
+#    새 판(예: K-WAIS 새 개정판)의 표 읽기 = SPECS 항목 + H.INSTRUMENT_PAGES 페이지 번호 (파싱 코드 추가 없음)
+#    새 검사 이름이면 판별 신호(K.INSTRUMENT_SIGNALS)와 B.IQ_EXTRACTORS 항목도 필요
+# -------------------------------
+
+# ✅ 규칙 종류 (선언용, 불변)
+@dataclass(frozen=True)
+class RowPattern:
+    """
+    ✅ 한 줄 = 한 행 — 정규식 이름 그룹이 필드
+       행 이름: key 그룹 → 줄에 포함된 labels 중 하나(label_in_line) → labels 순서대로
+    """
+    pattern: str
+    labels: tuple = ()
+    label_in_line: bool = True
+    key: str = None  # 행 이름이 들어 있는 그룹 이름
+    convert: dict = field(default_factory=dict)  # 필드 → 변환 함수 (기본: 문자열 그대로)
+    compact: tuple = ()  # 공백을 모두 없앨 필드 ("92 - 108" → "92-108")
+    expect: int = None  # 완료로 볼 행 수 (기본: labels 수, labels가 없으면 1)
+
+
+@dataclass(frozen=True)
+class LabelGrid:
+    """✅ "행이름 값1 ... 값N" 줄 (N = 열 수) — K-WAIS 조합점수처럼 열이 지표인 표"""
+    rows: tuple  # 행 이름 (PDF 표기)
+    columns: tuple  # 열 이름 (지표)
+    fields: tuple = ()  # 행 이름 → 결과 필드 이름 (rows와 같은 순서, 기본: 행 이름 그대로)
+    expect: int = None  # 완료로 볼 행 수 (기본: 행 이름 수)
+
+
+@dataclass(frozen=True)
+class AnchorLine:
+    """✅ anchors가 모두 들어 있는 줄 바로 다음 줄의 정수들 (K-WAIS 소검사 약어 줄 → 점수 줄)"""
+    anchors: tuple
+
+
+@dataclass(frozen=True)
+class LabeledNumbers:
+    """✅ 라벨(이름/약어)이 나오는 줄의 index번째 정수 — 결과 키마다 처음 나온 줄만"""
+    labels: dict  # 검색어 → 결과 키
+    index: int
+    required: tuple = ()  # 완료 조건 (기본: 모든 결과 키)
+
+
+@dataclass(frozen=True)
+class LineNumbers:
+    """✅ 지정한 줄 번호(0-based)마다 nth번째 정수 토큰 — 표 머리글을 못 찾을 때의 기존 줄 번호 방식"""
+    lines: tuple
+    nth: int = 2
+
+
+@dataclass(frozen=True)
+class NumberRun:
+    """✅ 페이지 전체에서 정수 count개가 공백으로 이어진 첫 구간 (low~high 밖의 값은 버림)"""
+    count: int
+    low: int
+    high: int
+
+
+@dataclass(frozen=True)
+class WordColumn:
+    """✅ 단어 좌표로 header 열의 정수를 행 이름(labels)별로 — 다 못 읽으면 fallback(텍스트 규칙)"""
+    header: str
+    labels: tuple
+    fallback: object = None
+
+
+@dataclass(frozen=True)
+class Table:
+    page: str  # H.INSTRUMENT_PAGES[검사]의 페이지 이름
+    rule: object
+
+
+@dataclass(frozen=True)
+class InstrumentSpec:
+    instrument: str  # 페이지 번호 / 계측 라벨에 쓰는 검사 이름
+    tables: dict  # 표 이름 → Table
+    subtests: tuple = ()  # (지표, 소검사) — "소검사" 표 결과 순서
+
+# -------------------------------
+# ✅ 검사 명세
+# -------------------------------
+WPPSI_DOMAINS = {
+    "4세이상": ("언어이해", "시공간", "유동추론", "작업기억", "처리속도", "전체IQ"),
+    "4세미만": ("언어이해", "시공간", "작업기억", "전체IQ"),
+}
+# ✅ K-WPPSI 소검사명 (K-WPPSI 매뉴얼 순서 기반)
+WPPSI_SUBTESTS = {
+    "4세이상": (
+        ("시공간", "토막짜기"), ("언어이해", "상식"), ("유동추론", "행렬추리"), ("처리속도", "동형찾기"),
+        ("작업기억", "그림기억"), ("언어이해", "공통성"), ("유동추론", "공통그림찾기"), ("처리속도", "선택하기"),
+        ("작업기억", "위치찾기"), ("시공간", "모양맞추기"), ("언어이해", "어휘"),
+    ),
+    "4세미만": (
+        ("언어이해", "수용어휘"), ("시공간", "토막짜기"), ("작업기억", "그림기억"), ("언어이해", "상식"),
+        ("시공간", "모양맞추기"), ("작업기억", "위치찾기"), ("언어이해", "그림명명"),
+    ),
+}
+WPPSI_INDEX_ROW = (
+    r"(?P<환산점수합>\d+)\s+(?P<지표점수>\d+)\s+(?P<백분위>[\d.]+)\s+"
+    r"(?P<신뢰구간>\d+\s*-\s*\d+)\s*\(\s*\d+\s*-\s*\d+\s*\)\s+(?P<진단분류>[가-힣\s]{2,6})\s+(?P<SEM>[\d.]+)"
+)
+
+WISC_DOMAINS = ("언어이해", "시공간", "유동추론", "작업기억", "처리속도", "전체IQ")
+WISC_SUBTESTS = (
+    ("언어이해", "공통성"), ("언어이해", "어휘"), ("시공간", "토막짜기"), ("시공간", "퍼즐"),
+    ("유동추론", "행렬추리"), ("유동추론", "무게비교"), ("작업기억", "숫자"), ("작업기억", "그림기억"),
+    ("처리속도", "기호쓰기"), ("처리속도", "동형찾기"),
+)
+# 진단분류는 한 단어 또는 두 단어 ("평균", "매우 우수") — 두 단어는 그 뒤에 SEM 하나만 남을 때 (7칸 행)
+# 뒤에 각주 등 토큰이 더 붙은 행도 앞 6칸으로 읽음 (칸 수 6개 이상이면 모두 지표 행)
+WISC_INDEX_ROW = (
+    r"^\s*(?P<환산점수합>\d+)\s+(?P<지표점수>\d+)\s+(?P<백분위>\S+)\s+(?P<신뢰구간>\S*-\S*)\s+"
+    r"(?P<진단분류>\S+(?:\s+\S+(?=\s+\S+\s*$))?)\s+(?P<SEM>\S+)(?:\s+\S+)*\s*$"
+)
+
+WAIS_DOMAINS = ("언어이해", "지각추론", "작업기억", "처리속도", "전체검사")
+WAIS_SUBTESTS = (
+    ("언어이해", "공통성"), ("언어이해", "어휘"), ("언어이해", "상식"),
+    ("지각추론", "토막짜기"), ("지각추론", "행렬추론"), ("지각추론", "퍼즐"),
+    ("작업기억", "숫자"), ("작업기억", "산수"),
+    ("처리속도", "동형찾기"), ("처리속도", "기호쓰기"),
+)
+
+TCI_SCALES = {
+    "자극추구": "NS", "위험회피": "HA", "사회적 민감성": "RD", "인내력": "PS",
+    "자율성": "SD", "연대감": "CO", "자기초월": "ST", "자율성+연대감": "SC",
+}
+
+
+def _wppsi_spec(variant):
+    subtests = WPPSI_SUBTESTS[variant]
+    return InstrumentSpec("WPPSI", {
+        "지표": Table("지표", RowPattern(WPPSI_INDEX_ROW, WPPSI_DOMAINS[variant], compact=("신뢰구간",))),
+        "소검사": Table("소검사", WordColumn(
+            "환산점수", tuple(name for _, name in subtests),
+            fallback=LineNumbers(tuple(range(2, 2 + len(subtests)))),
+        )),
+    }, subtests)
+
+
+SPECS = {
+    "WPPSI_4세이상": _wppsi_spec("4세이상"),
+    "WPPSI_4세미만": _wppsi_spec("4세미만"),
+    "WISC": InstrumentSpec("WISC", {
+        "지표": Table("지표", RowPattern(WISC_INDEX_ROW, WISC_DOMAINS, label_in_line=False)),
+        "소검사": Table("소검사", WordColumn(
+            "환산점수", tuple(name for _, name in WISC_SUBTESTS),
+            fallback=LineNumbers((1, 2, 5, 6, 7, 8, 11, 12, 14, 15)),
+        )),
+    }, WISC_SUBTESTS),
+    "WAIS": InstrumentSpec("WAIS", {
+        "지표": Table("지표", LabelGrid(
+            ("환산점수합", "조합점수", "백분위", "95%신뢰구간"), WAIS_DOMAINS,
+            fields=("환산점수합", "조합점수", "백분위", "신뢰구간"),
+        )),
+        "소검사": Table("소검사", AnchorLine(("SI", "VC", "IN", "CO", "BD"))),
+    }, WAIS_SUBTESTS),
+    "TCI": InstrumentSpec("TCI", {
+        # 척도 이름 또는 약어가 나오는 줄의 세 번째 숫자(원점수, T점수 다음)
+        "백분위": Table("백분위", LabeledNumbers(
+            {**{name: name for name in TCI_SCALES}, **{code: name for name, code in TCI_SCALES.items()}},
+            index=2, required=tuple(TCI_SCALES)[:6],
+        )),
+        "M(SD)": Table("M(SD)", RowPattern(
+            r"(?P<code>[A-Z]{2}\d)\s+\d+\s+(?P<M>[\d.]+)\s*\((?P<SD>[\d.]+)\)",
+            key="code", convert={"M": float, "SD": float},
+        )),
+    }),
+    "PAT": InstrumentSpec("PAT", {
+        "백분위": Table("백분위", NumberRun(8, 10, 100)),
+    }),
+}
+
+# -------------------------------
+# ✅ 컴파일된 규칙 — parse(text, lines)로 페이지 텍스트 한 장을 읽고 complete()로 검증
+#    lines는 페이지마다 한 번만 나눈 줄 목록(앞뒤 공백 제거)을 모든 규칙이 공유
+#    줄 위치가 필요 없는 규칙은 페이지 전체에 컴파일된 정규식 한 번 (파이썬 줄 반복 없음)
+# -------------------------------
+_DIGITS = re.compile(r"\d+")
+
+
+def _alternation(words):
+    # 긴 이름 먼저 ("자율성+연대감"이 "자율성"보다 앞)
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+def _line_at(text, start, end):
+    """✅ 매칭 위치가 들어 있는 줄 (줄 시작 위치, 줄 내용)"""
+    begin = text.rfind("\n", 0, start) + 1
+    stop = text.find("\n", end)
+    return begin, text[begin:stop if stop >= 0 else len(text)]
+
+
+class _Rows:
+    needs_lines = True
+
+    def __init__(self, rule):
+        pattern = re.compile(rule.pattern)
+        self.search = pattern.search
+        self.labels = rule.labels
+        self.label_search = (
+            re.compile(_alternation(rule.labels)).search if rule.labels and rule.label_in_line else None
+        )
+        self.key = rule.key
+        self.fields = tuple(
+            (name, rule.convert.get(name), name in rule.compact) for name in pattern.groupindex if name != rule.key
+        )
+        self.expect = rule.expect or len(rule.labels) or 1
+
+    def parse(self, text, lines):
+        rows = {}
+        position = 0  # 다음 순서 라벨
+        search, label_search, key = self.search, self.label_search, self.key
+        for line in lines:
+            match = search(line)
+            if match is None:
+                continue
+            if key is not None:
+                label = match.group(key)
+            else:
+                found = label_search(line) if label_search is not None else None
+                if found is not None:
+                    label = found.group()
+                elif position < len(self.labels):
+                    label = self.labels[position]
+                    position += 1
+                else:
+                    continue
+            values = {}
+            for name, convert, compact in self.fields:
+                value = match.group(name).strip()
+                if compact:
+                    value = "".join(value.split())
+                values[name] = convert(value) if convert else value
+            rows[label] = values
+        return rows
+
+    def complete(self, value):
+        return len(value) >= self.expect
+
+
+class _Grid:
+    needs_lines = False
+
+    def __init__(self, rule):
+        self.rows = dict(zip(rule.rows, rule.fields or rule.rows))
+        self.width = len(rule.columns) + 1
+        # 행 이름으로 시작하는 줄만 찾아서 나눔
+        self.finditer = re.compile(r"^[^\S\n]*(?:%s)[^\S\n][^\n]*" % _alternation(rule.rows), re.M).finditer
+        self.expect = rule.expect or len(rule.rows)
+
+    def parse(self, text, lines):
+        grid = {}
+        for match in self.finditer(text):
+            parts = match.group().split()
+            if len(parts) == self.width and parts[0] in self.rows:
+                grid[self.rows[parts[0]]] = parts[1:]
+        return grid  # 결과 필드 → 열별 값
+
+    def complete(self, value):
+        return len(value) >= self.expect
+
+
+class _Anchor:
+    needs_lines = False
+
+    def __init__(self, rule):
+        # 약어가 모두 들어 있는 첫 줄 + (있으면) 다음 줄
+        lookaheads = "".join(r"(?=[^\n]*%s)" % re.escape(a) for a in rule.anchors)
+        self.search = re.compile(r"^%s[^\n]*(?:\n([^\n]*))?" % lookaheads, re.M).search
+
+    def parse(self, text, lines):
+        match = self.search(text)
+        if match is None or match.group(1) is None:
+            return []
+        return [int(s) for s in match.group(1).split() if s.isdigit()]
+
+    def complete(self, value):
+        return bool(value)
+
+
+class _Labeled:
+    needs_lines = False
+
+    def __init__(self, rule):
+        self.labels = rule.labels
+        self.finditer = re.compile(_alternation(rule.labels)).finditer
+        self.index = rule.index
+        self.required = rule.required or tuple(set(rule.labels.values()))
+
+    def parse(self, text, lines):
+        found = {}
+        numbers_at = {}  # 줄 시작 위치 → 그 줄의 정수들 (같은 줄의 라벨끼리 공유)
+        for match in self.finditer(text):
+            key = self.labels[match.group()]
+            if key in found:
+                continue
+            begin, line = _line_at(text, match.start(), match.end())
+            numbers = numbers_at.get(begin)
+            if numbers is None:
+                numbers = numbers_at[begin] = _DIGITS.findall(line)
+            if len(numbers) > self.index:
+                found[key] = int(numbers[self.index])
+        return found
+
+    def complete(self, value):
+        return all(k in value for k in self.required)
+
+
+class _LineNumbers:
+    needs_lines = True
+
+    def __init__(self, rule):
+        self.lines = tuple(sorted(rule.lines))
+        self.nth = rule.nth
+        self.expect = len(rule.lines)
+
+    def parse(self, text, lines):
+        numbers = []
+        for i in self.lines:
+            if i >= len(lines):
+                break
+            digits = [token for token in lines[i].split() if token.isdigit()]
+            if len(digits) >= self.nth:
+                numbers.append(int(digits[self.nth - 1]))
+        return numbers
+
+    def complete(self, value):
+        return len(value) == self.expect
+
+
+class _NumberRun:
+    needs_lines = False
+
+    def __init__(self, rule):
+        self.search = re.compile(r"(\d+\s+){%d}\d+" % (rule.count - 1)).search
+        self.low, self.high = rule.low, rule.high
+        self.expect = rule.count
+
+    def parse(self, text, lines):
+        match = self.search(text)
+        if match is None:
+            return []
+        return [n for n in map(int, _DIGITS.findall(match.group())) if self.low <= n <= self.high]
+
+    def complete(self, value):
+        return len(value) == self.expect
+
+
+class _Words:
+    def __init__(self, rule):
+        self.header = rule.header
+        self.labels = rule.labels
+        self.fallback = _compile_rule(rule.fallback) if rule.fallback is not None else None
+
+    def parse_words(self, words):
+        grid = column_values(words, self.header, self.labels)
+        if len(grid) == len(self.labels):
+            return [grid[name] for name in self.labels]
+        return None
+
+    def complete(self, value):
+        return value is not None and len(value) == len(self.labels)
+
+
+MATCHERS = {
+    RowPattern: _Rows,
+    LabelGrid: _Grid,
+    AnchorLine: _Anchor,
+    LabeledNumbers: _Labeled,
+    LineNumbers: _LineNumbers,
+    NumberRun: _NumberRun,
+    WordColumn: _Words,
+}
+
+
+def _compile_rule(rule):
+    return MATCHERS[type(rule)](rule)
+
+
+class CompiledPage:
+    """✅ 한 페이지의 규칙 묶음 — 텍스트는 한 번만 줄로 나누고, 검증에서 파싱한 결과를 그대로 사용"""
+
+    def __init__(self, instrument, index, tables):
+        self.instrument = instrument
+        self.index = index
+        self.word_tables = [(name, m) for name, m in tables if isinstance(m, _Words)]
+        self.text_tables = [(name, m) for name, m in tables if not isinstance(m, _Words)]
+
+    def parse_text(self, text, tables):
+        with stage("parse", instrument=self.instrument):
+            lines = [line.strip() for line in text.split("\n")] if any(m.needs_lines for _, m in tables) else None
+            return {name: m.parse(text, lines) for name, m in tables}
+
+    def extract(self, doc):
+        results = {}
+        tables = list(self.text_tables)
+        if self.word_tables:
+            # ✅ 단어 좌표 규칙 먼저, 다 못 읽은 표만 텍스트 규칙(fallback)으로
+            words = doc.page_words(self.index)
+            for name, m in self.word_tables:
+                with stage("parse", instrument=self.instrument):
+                    value = m.parse_words(words)
+                if value is not None:
+                    results[name] = value
+                elif m.fallback is not None:
+                    tables.append((name, m.fallback))
+        if not tables:
+            return results
+
+        # 검증에서 파싱한 결과를 그대로 재사용 (같은 텍스트를 두 번 파싱하지 않음)
+        last = [None, None]
+
+        def parse(text):
+            if last[0] is not text:
+                last[:] = text, self.parse_text(text, tables)
+            return last[1]
+
+        def validate(text):
+            parsed = parse(text)
+            return all(m.complete(parsed[name]) for name, m in tables)
+
+        results.update(parse(doc.page_text(self.index, validate=validate)))
+        return results
+
+
+class CompiledSpec:
+    def __init__(self, spec):
+        self.spec = spec
+        self.matchers = {name: _compile_rule(t.rule) for name, t in spec.tables.items()}
+        pages = {}
+        for name, t in spec.tables.items():
+            pages.setdefault(INSTRUMENT_PAGES[spec.instrument][t.page], []).append(name)
+        self.pages = pages
+        self._compiled_pages = {}
+        for index, names in pages.items():
+            self.page(index, names)
+
+    def page(self, index, names):
+        key = (index, tuple(names))
+        if key not in self._compiled_pages:
+            self._compiled_pages[key] = CompiledPage(
+                self.spec.instrument, index, [(name, self.matchers[name]) for name in names]
+            )
+        return self._compiled_pages[key]
+
+
+COMPILED = {}
+
+
+def register(name, spec):
+    """✅ 명세 추가/교체 — 규칙은 여기서 한 번만 컴파일"""
+    COMPILED[name] = CompiledSpec(spec)
+
+
+for _name, _spec in SPECS.items():
+    register(_name, _spec)
+
+# -------------------------------
+# ✅ 엔진 API
+# -------------------------------
+def extract(doc, spec_name, *tables):
+    """
+    ✅ doc: H.PDFDocument — 표 이름 → 파싱 결과 (tables가 없으면 명세의 모든 표)
+       같은 페이지의 표들은 한 번에 파싱
+    """
+    compiled = COMPILED[spec_name]
+    wanted = set(tables or compiled.spec.tables)
+    results = {}
+    for index, names in compiled.pages.items():
+        names = [n for n in names if n in wanted]
+        if names:
+            results.update(compiled.page(index, names).extract(doc))
+    return results
+
+
+def subtest_column(doc, spec_name):
+    """
+    ✅ WordColumn 규칙의 "소검사" 표 (K-WISC / K-WPPSI) — 환산점수 정수 목록
+       H.column_values로 '환산점수' 열을 소검사 이름별로 읽고, 표 머리글을 찾지 못하면 명세의 줄 번호 방식
+    """
+    return extract(doc, spec_name, "소검사")["소검사"]
+
+
+def index_scores(spec_name, value):
+    """✅ "지표" 표 결과 → IndexScore(행 규칙) / CompositeScore(열 표) 튜플"""
+    rule = COMPILED[spec_name].spec.tables["지표"].rule
+    if isinstance(rule, LabelGrid):
+        empty = [""] * len(rule.columns)
+        return tuple(
+            CompositeScore(domain, **{f: value.get(f, empty)[col] for f in rule.fields or rule.rows})
+            for col, domain in enumerate(rule.columns)
+        )
+    return tuple(IndexScore(domain=label, **fields) for label, fields in value.items())
+
+
+def subtest_scores(spec_name, numbers, name_map=None):
+    """✅ "소검사" 표 결과(정수 목록) → SubtestScore 튜플 (순서: name_map 또는 명세), 모자라면 None"""
+    return tuple(
+        SubtestScore(domain, name, numbers[i] if i < len(numbers) else None)
+        for i, (domain, name) in enumerate(name_map or COMPILED[spec_name].spec.subtests)
+    )
+
+
+def is_complete(spec_name, table, value):
+    return COMPILED[spec_name].matchers[table].complete(value)
+
+
+def instrument_of(spec_name):
+    """✅ 명세의 검사 이름 (H.document의 페이지 계획용)"""
+    return COMPILED[spec_name].spec.instrument
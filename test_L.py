@@ -0,0 +1,33 @@
+import json
+
+import L
+import Q
+
+
+def _reference_data(tmp_path, payload):
+    source = tmp_path / "temperament.json"
+    source.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+    data = L.ReferenceData(L.SnapshotStore(str(tmp_path / "snapshots")), check_interval=0)
+    data.add("temperament", L.LocalFileSource(str(source)))
+    return data, source
+
+
+def test_refresh_with_empty_snapshot_dir(tmp_path):
+    """✅ 스냅샷이 없을 때 계측(Q.stage/Q.inc)을 거쳐 원본을 받아 저장"""
+    data, _ = _reference_data(tmp_path, {"자극추구": "설명"})
+    Q.metrics.clear()
+
+    value, worker_metrics = Q.call_with_metrics(data.load, "temperament")
+
+    assert value == {"자극추구": "설명"}
+    assert data.store.current("temperament") is not None
+    assert any("reference_bytes_total" in str(key) for key in worker_metrics["counters"])
+
+
+def test_refresh_picks_up_new_version(tmp_path):
+    """✅ 원본이 바뀌면 다음 확인 때 새 스냅샷으로 교체"""
+    data, source = _reference_data(tmp_path, {"v": 1})
+    assert data.load("temperament") == {"v": 1}
+
+    source.write_text(json.dumps({"v": 2}), encoding="utf-8")
+    assert data.load("temperament") == {"v": 2}